@@ -1,15 +1,43 @@
-from flask import Flask, request, jsonify  # type: ignore
+from flask import Flask, request, jsonify, Response  # type: ignore
 from orderbook import MultiSecurityOrderBook, Order
+from persistence import TradeStore
+from positions import PositionKeeper
+from bots import market_maker_bot
 from flask_cors import CORS  # type: ignore
-import random
+import config
+import atexit
+import json
+import math
+import os
 import time
 import threading
 
 app = Flask(__name__)
 CORS(app)
 
+# The debug reloader runs this module twice (watcher parent + serving child), so only the
+# serving process may create the shared memory segment; the parent would hold the name.
+serving_process = __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
 # Global instance of MultiSecurityOrderBook
-multi_security_order_book = MultiSecurityOrderBook()
+multi_security_order_book = MultiSecurityOrderBook(config.TICKERS_SHM_NAME if serving_process else None)
+atexit.register(multi_security_order_book.top_of_book.close)  # unlinks the segment, if any
+
+# Per-trader positions and P&L, updated on every fill
+position_keeper = PositionKeeper(multi_security_order_book)
+multi_security_order_book.add_listener(position_keeper)
+
+# Optional SQL persistence of trades and order events, written off the engine thread
+trade_store = None
+if config.PERSISTENCE_ENABLED:
+    trade_store = TradeStore(
+        db_path=config.PERSISTENCE_DB_PATH,
+        flush_size=config.PERSISTENCE_FLUSH_SIZE,
+        flush_interval=config.PERSISTENCE_FLUSH_INTERVAL,
+        max_queue=config.PERSISTENCE_MAX_QUEUE
+    ).start()
+    multi_security_order_book.add_listener(trade_store)
+    atexit.register(trade_store.close)  # the writer is a daemon thread, flush the last batch
 
 # Set initial LTPs for AAPL, TSLA, MSFT
 # IPO Listings lmao
@@ -24,64 +52,13 @@ for stock, initial_ltp in stock_initial_ltps.items():
     initial_buy = Order("BUY", initial_ltp, 1, "LIMIT", "INITIAL_USER")
     initial_sell = Order("SELL", initial_ltp, 1, "LIMIT", "INITIAL_USER")
     order_book.add_limit_order(initial_buy)
-    order_book.add_limit_order(initial_sell)
-    order_book.matchAllOrders()  # Sets LTP to initial value
-
-# making a function for the market making trading bot
-# no need for an extra file
-def market_maker_bot(multi_order_book, stock_symbol, trader_id):
-    """Market-making bot with wider range, aggressive matching, and consistent order placement."""
-    order_book = multi_order_book.get_order_book(stock_symbol)
-    max_orders = 10
-    active_orders = {}
-    range_width = 15  # ±15 from LTP for larger range
+    order_book.add_limit_order(initial_sell)  # Crosses the initial buy, sets LTP to initial value
 
+def order_expiry_loop(multi_order_book, interval=1.0):
+    """Periodically expire DAY/GTD orders across all order books."""
     while True:
-        ltp = order_book.get_ltp()
-        if ltp is None:
-            ltp = random.uniform(30, 50)
-
-        # Check and remove matched/canceled orders from active_orders
-        orders_to_remove = []
-        for order_id in active_orders:
-            if order_id not in order_book.orders:  # Order no longer in the order book
-                orders_to_remove.append(order_id)
-        for order_id in orders_to_remove:
-            del active_orders[order_id]
-            print(f"Market Maker ({trader_id}) removed matched/canceled order ID {order_id} from active_orders")
-
-        if len(active_orders) < max_orders and random.random() < 0.7:
-            side = random.choice(["BUY", "SELL"])
-            min_price = max(1, int(ltp - range_width))
-            max_price = int(ltp + range_width)
-            base_price = random.randint(min_price, max_price)
-
-            best_bid_price = order_book.get_best_bid()
-            best_ask_price = order_book.get_best_ask()
-            price = base_price
-
-            # Very aggressive matching bias (exact match)
-            if side == "BUY" and best_ask_price is not None:
-                price = int(best_ask_price)  # Exact match with best ask
-            elif side == "SELL" and best_bid_price is not None:
-                price = int(best_bid_price)  # Exact match with best bid
-
-            price = max(1, price)
-            quantity = random.randint(1, 20)
-
-            order = Order(side, price, quantity, "LIMIT", trader_id)
-            order_book.add_limit_order(order)
-            order_book.matchAllOrders()
-            active_orders[order.orderId] = order
-            print(f"Market Maker ({trader_id}) placed {side} order on {stock_symbol}: {quantity} @ {price} (LTP: {ltp})")
-
-        elif active_orders and random.random() < 0.3:  # Increased cancellation probability
-            order_id = random.choice(list(active_orders.keys()))
-            order_book.cancelOrder(order_id)
-            del active_orders[order_id]
-            print(f"Market Maker ({trader_id}) canceled order ID {order_id} on {stock_symbol}")
-
-        time.sleep(random.uniform(1, 3))
+        multi_order_book.expire_orders()
+        time.sleep(interval)
 
 @app.route('/place_trade', methods=['POST'])
 def process_order():
@@ -91,6 +68,9 @@ def process_order():
         order_side = data.get("order_side")
         price = data.get("price")
         quantity = data.get("quantity")
+        trader_id = data.get("trader_id")  # optional, orders default to "anonymous"
+        time_in_force = data.get("time_in_force", "GTC")
+        expire_at = data.get("expire_at")  # epoch seconds, required for GTD
         order_type = "limit"  # Enforcing limit orders only
 
         # Validate input
@@ -107,8 +87,14 @@ def process_order():
         if not isinstance(price, (int, float)) or not isinstance(quantity, int) or price <= 0 or quantity <= 0:
             return jsonify({"error": "Price must be positive float and quantity must be positive integer"}), 400
 
+        if time_in_force not in ["GTC", "DAY", "GTD"]:
+            return jsonify({"error": "Invalid time in force (must be 'GTC', 'DAY' or 'GTD')"}), 400
+
+        if time_in_force == "GTD" and (not isinstance(expire_at, (int, float)) or expire_at <= time.time()):
+            return jsonify({"error": "GTD orders need an expire_at time in the future"}), 400
+
         # Create limit order object
-        order = Order(order_side, price, quantity, order_type)
+        order = Order(order_side, price, quantity, order_type, trader_id, time_in_force, expire_at)
 
         # Add order to the specific stock's order book and attempt matching
         response = multi_security_order_book.add_order(stock, order)
@@ -140,6 +126,58 @@ def get_orderbook(symbol):
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@app.route('/tickers', methods=['GET'])
+def get_tickers():
+    try:
+        return jsonify({"tickers": multi_security_order_book.get_tickers()})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+MIN_STREAM_INTERVAL = 0.05  # seconds, keeps a tiny interval from becoming a busy loop
+
+@app.route('/tickers/stream', methods=['GET'])
+def stream_tickers():
+    """Server-sent events: pushes the ticker rows whose sequence number moved."""
+    interval = request.args.get("interval", 0.25, type=float)
+    if not (math.isfinite(interval) and interval > 0):  # nan and inf would kill the stream mid-response
+        return jsonify({"error": "interval must be a positive number of seconds"}), 400
+    interval = max(interval, MIN_STREAM_INTERVAL)
+
+    def generate():
+        last_seqs = {}
+        while True:
+            changed = [row for row in multi_security_order_book.get_tickers()
+                       if last_seqs.get(row["symbol"]) != row["seq"]]
+            for row in changed:
+                last_seqs[row["symbol"]] = row["seq"]
+            if changed:
+                yield f"data: {json.dumps(changed)}\n\n"
+            time.sleep(interval)
+
+    return Response(generate(), mimetype="text/event-stream")
+
+@app.route('/portfolio/<trader_id>', methods=['GET'])
+def get_portfolio(trader_id):
+    try:
+        return jsonify(position_keeper.get_portfolio(trader_id))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/trades/<trader_id>', methods=['GET'])
+def get_trades(trader_id):
+    try:
+        if trade_store is None:
+            return jsonify({"error": "Trade persistence is disabled"}), 503
+
+        symbol = request.args.get("symbol")
+        limit = request.args.get("limit", 100, type=int)
+        return jsonify({"trades": trade_store.trades_for_trader(trader_id, symbol, limit)})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
     
 # start the bot when the app launches. 
 if __name__ == '__main__':
@@ -161,6 +199,11 @@ if __name__ == '__main__':
             daemon=True
         )
     ]
+    bot_threads.append(threading.Thread(
+        target=order_expiry_loop,
+        args=(multi_security_order_book,),
+        daemon=True
+    ))
     for thread in bot_threads:
         thread.start()
 
@@ -0,0 +1,339 @@
+'''
+Accelerated backtests: drive MultiSecurityOrderBook and the bots on a simulated clock.
+
+Nothing here sleeps. SimClock keeps a heap of (wake time, callback) and jumps straight
+to the next event, so the run is as fast as the engine can process it, and wall time
+versus simulated time doubles as a throughput benchmark.
+
+Inputs:
+- historical daily series (frontend/public/stocks_historical_data.json) through
+  ColumnarSeries, which converts the JSON to float64 columns once and, given a
+  cache path, memory-maps them on later loads
+- order journals recorded by persistence.TradeStore (order_events table), replayed
+  at their original times
+
+For each bar a tape participant walks the price from the previous close to the bar's
+value in steps during a compressed session, sweeping the book so every step prints
+exactly at the historical price; the market makers trade around it in between.
+
+Run from the backend directory:
+python backtest.py [days] [session_seconds]
+'''
+import array, bisect, calendar, contextlib, heapq, itertools, json, mmap, os, random, sqlite3, sys, time
+from datetime import datetime
+from bots import market_maker_steps
+from orderbook import MultiSecurityOrderBook, Order, OrderBook, OrderBookListener
+from positions import PositionKeeper
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "..", "frontend", "public", "stocks_historical_data.json")
+SESSION_OPEN_SECONDS = 9.5 * 3600 # sessions open at 09:30 on the bar's date
+TAPE_TRADER = "HISTORICAL_TAPE"
+
+
+'''
+Historical series stored column-wise: per symbol one float64 column of timestamps and
+one of values. The binary cache is laid out as:
+header length (8 bytes) | JSON header {symbol: [offset, length]} padded to 8 bytes | columns
+'''
+class ColumnarSeries:
+    def __init__(self, columns, mapped=None):
+        self.columns = columns # symbol -> (times, values), arrays or memoryviews of doubles
+        self.mapped = mapped # open mmap when loaded from a cache file
+
+    @classmethod
+    def from_json(cls, path=DEFAULT_HISTORY):
+        """Parse the frontend's {symbol: [{"time": "YYYY-MM-DD", "value": x}]} file."""
+        with open(path) as f:
+            data = json.load(f)
+        columns = {}
+        for symbol, points in data.items():
+            points = sorted(points, key=lambda point: point["time"])
+            times = array.array("d", (calendar.timegm(datetime.strptime(point["time"], "%Y-%m-%d").timetuple())
+                                      for point in points))
+            values = array.array("d", (point["value"] for point in points))
+            columns[symbol] = (times, values)
+        return cls(columns)
+
+    @classmethod
+    def load(cls, path=DEFAULT_HISTORY, cache_path=None):
+        """Load a series, going through (and refreshing) the memory-mapped cache if one is given."""
+        if cache_path is None:
+            return cls.from_json(path)
+        if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(path):
+            cls.from_json(path).save(cache_path)
+        return cls.open(cache_path)
+
+    def save(self, cache_path):
+        header, offset = {}, 0
+        for symbol, (times, values) in self.columns.items():
+            header[symbol] = [offset, len(times)]
+            offset += 16 * len(times) # timestamps then values, 8 bytes each
+        encoded = json.dumps(header).encode()
+        encoded += b" " * (-len(encoded) % 8) # keep the columns 8-byte aligned
+        with open(cache_path, "wb") as f:
+            f.write(len(encoded).to_bytes(8, "little"))
+            f.write(encoded)
+            for times, values in self.columns.values():
+                f.write(array.array("d", times).tobytes())
+                f.write(array.array("d", values).tobytes())
+
+    @classmethod
+    def open(cls, cache_path):
+        """Memory-map a cache written by save(); columns are zero-copy views of the file."""
+        with open(cache_path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_length = int.from_bytes(mapped[:8], "little")
+        header = json.loads(mapped[8:8 + header_length])
+        base = 8 + header_length
+        view = memoryview(mapped)
+        columns = {}
+        for symbol, (offset, length) in header.items():
+            start = base + offset
+            times = view[start:start + 8 * length].cast("d")
+            values = view[start + 8 * length:start + 16 * length].cast("d")
+            columns[symbol] = (times, values)
+        return cls(columns, mapped)
+
+    def symbols(self):
+        return list(self.columns.keys())
+
+    def __getitem__(self, symbol):
+        return self.columns[symbol]
+
+    def close(self):
+        if self.mapped is not None:
+            for times, values in self.columns.values():
+                times.release()
+                values.release()
+            self.columns = {}
+            self.mapped.close()
+            self.mapped = None
+
+
+def load_order_journal(db_path, symbols=None):
+    """Yield recorded order events in time order as dicts, for replay."""
+    query = ("SELECT order_id, symbol, event, side, price, quantity, order_type, time_in_force, "
+             "expire_at, trader_id, created_at FROM order_events "
+             "WHERE event IN ('ACCEPTED', 'AMENDED', 'CANCELLED') ORDER BY created_at, id")
+    columns = ("order_id", "symbol", "event", "side", "price", "quantity", "order_type",
+               "time_in_force", "expire_at", "trader_id", "created_at")
+    conn = sqlite3.connect(db_path)
+    try:
+        for row in conn.execute(query): # streamed from the cursor, never loaded whole
+            event = dict(zip(columns, row))
+            if symbols is None or event["symbol"] in symbols:
+                yield event
+    finally:
+        conn.close()
+
+
+class SimClock:
+    ''' Virtual time that only moves when the next scheduled callback runs. '''
+    def __init__(self, start=0.0):
+        self.now = start
+        self.events = [] # heap of (time, sequence, callback)
+        self.sequence = itertools.count() # ties run in scheduling order
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, callback):
+        heapq.heappush(self.events, (max(when, self.now), next(self.sequence), callback))
+
+    def spawn(self, steps, start=None, reschedule=None):
+        """Drive a generator that yields sleep durations, as bots.market_maker_steps does.
+
+        `reschedule` may move each wake-up time, returning None stops the generator.
+        """
+        def step():
+            try:
+                delay = next(steps)
+            except StopIteration:
+                return
+            wake = self.now + delay
+            if reschedule:
+                wake = reschedule(wake)
+            if wake is not None:
+                self.call_at(wake, step)
+        self.call_at(self.now if start is None else start, step)
+
+    def run(self, until=None):
+        """Run callbacks in time order until the heap is empty or the next one is after `until`."""
+        while self.events and (until is None or self.events[0][0] <= until):
+            when, _, callback = heapq.heappop(self.events)
+            self.now = when
+            callback()
+        if until is not None:
+            self.now = max(self.now, until)
+
+
+class ActivityCounter(OrderBookListener):
+    def __init__(self):
+        self.orders = 0
+        self.trades = 0
+
+    def on_order_event(self, symbol, event, order, timestamp):
+        if event == "ACCEPTED":
+            self.orders += 1
+
+    def on_trade(self, symbol, buy_order, sell_order, price, quantity, timestamp):
+        self.trades += 1
+
+
+class Backtest:
+    def __init__(self, series=None, journal=None, days=None, session_seconds=600, tape_interval=60,
+                 market_makers=True, seed=0, engine=OrderBook):
+        ''' Prepare a run over a ColumnarSeries and/or an iterable of journal events. '''
+        self.series = series
+        self.journal = journal
+        self.days = days # only the first `days` bars of each series
+        self.session_seconds = session_seconds # simulated length of each daily session
+        self.tape_interval = tape_interval # simulated seconds between tape prints
+        self.market_makers = market_makers
+        self.rng = random.Random(seed)
+        self.sessions = self._sessions()
+        self.session_opens = [opened for opened, _ in self.sessions]
+
+        self.first_event = None
+        if journal is not None:
+            self.journal = iter(journal)
+            self.first_event = next(self.journal, None)
+
+        starts = self.session_opens[:1]
+        if self.first_event is not None:
+            starts.append(self.first_event["created_at"])
+        self.clock = SimClock(min(starts, default=0.0))
+        self.market = MultiSecurityOrderBook(clock=self.clock.time, engine=engine)
+        self.positions = PositionKeeper(self.market)
+        self.counter = ActivityCounter()
+        self.market.add_listener(self.positions)
+        self.market.add_listener(self.counter)
+
+    def _bars(self, symbol):
+        times, values = self.series[symbol]
+        count = len(times) if self.days is None else min(self.days, len(times))
+        return times[:count], values[:count]
+
+    def _sessions(self):
+        """Sorted (open, close) of every day that has at least one bar."""
+        if self.series is None:
+            return []
+        days = set()
+        for symbol in self.series.symbols():
+            times, _ = self._bars(symbol)
+            days.update(times)
+        return [(day + SESSION_OPEN_SECONDS, day + SESSION_OPEN_SECONDS + self.session_seconds)
+                for day in sorted(days)]
+
+    def in_session(self, when):
+        """Move `when` to the next session open if it falls between sessions, None after the last."""
+        i = bisect.bisect_right(self.session_opens, when) - 1
+        if i >= 0 and when < self.sessions[i][1]:
+            return when
+        return self.session_opens[i + 1] if i + 1 < len(self.sessions) else None
+
+    def print_price(self, symbol, price):
+        """Make the book trade exactly at `price`: sweep everything through it, then cross one lot."""
+        order_book = self.market.get_order_book(symbol)
+        now = self.clock.time()
+        book = order_book.depth()
+        bids_through = sum(quantity for level_price, quantity, _ in book["bids"] if level_price >= price)
+        asks_through = sum(quantity for level_price, quantity, _ in book["asks"] if level_price <= price)
+        if bids_through:
+            order_book.add_limit_order(Order("SELL", price, bids_through, "LIMIT", TAPE_TRADER, timestamp=now))
+        if asks_through:
+            order_book.add_limit_order(Order("BUY", price, asks_through, "LIMIT", TAPE_TRADER, timestamp=now))
+        # nothing rests through the price now, so this pair trades with each other at it
+        order_book.add_limit_order(Order("SELL", price, 1, "LIMIT", TAPE_TRADER, timestamp=now))
+        order_book.add_limit_order(Order("BUY", price, 1, "LIMIT", TAPE_TRADER, timestamp=now))
+
+    def tape_steps(self, symbol):
+        """Open each session at the previous close and walk to the bar's value by the close."""
+        times, values = self._bars(symbol)
+        steps = max(1, int(self.session_seconds // self.tape_interval))
+        interval = self.session_seconds / steps
+        previous = values[0]
+        for day, value in zip(times, values):
+            opened = day + SESSION_OPEN_SECONDS
+            if self.clock.time() < opened:
+                yield opened - self.clock.time()
+            for step in range(steps + 1):
+                if step:
+                    yield interval
+                self.print_price(symbol, round(previous + (value - previous) * step / steps, 2))
+                self.market.expire_orders()
+            previous = value
+
+    def journal_steps(self):
+        """Replay journal events at their recorded times, mapping recorded ids to new orders."""
+        replayed = {} # recorded order id -> (symbol, new order id)
+        event = self.first_event
+        while event is not None:
+            if event["created_at"] > self.clock.time():
+                yield event["created_at"] - self.clock.time()
+            # EXPIRED events are not journalled, so DAY/GTD orders lapse here as they did live
+            self.market.expire_orders()
+            order_book = self.market.get_order_book(event["symbol"])
+            if order_book is not None:
+                if event["event"] == "ACCEPTED":
+                    order = Order(event["side"], event["price"], event["quantity"], event["order_type"],
+                                  event["trader_id"], event["time_in_force"], event["expire_at"],
+                                  timestamp=event["created_at"])
+                    replayed[event["order_id"]] = order.orderId
+                    order_book.add_limit_order(order)
+                elif event["order_id"] in replayed:
+                    order_id = replayed[event["order_id"]]
+                    if event["event"] == "CANCELLED":
+                        order_book.cancel_order(order_id)
+                    else:
+                        order_book.amend_order(order_id, event["quantity"], event["price"])
+            event = next(self.journal, None)
+
+    def run(self, quiet=True):
+        """Run to completion and return a summary of the simulation and its speed."""
+        if self.series is not None:
+            for symbol in self.series.symbols():
+                if self.market.get_order_book(symbol) is None:
+                    continue
+                self.clock.spawn(self.tape_steps(symbol))
+                if self.market_makers and self.sessions:
+                    bot = market_maker_steps(self.market, symbol, f"BOT_MM_{symbol}",
+                                             random.Random(self.rng.random()))
+                    # first step just after the opening print, so the bot quotes around a real LTP
+                    self.clock.spawn(bot, self.session_opens[0] + 1, self.in_session)
+        if self.journal is not None:
+            self.clock.spawn(self.journal_steps())
+
+        started = self.clock.time()
+        began = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            if quiet:
+                # the engine and bots print on every event, keep that out of the timings
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            self.clock.run()
+        wall_seconds = time.perf_counter() - began
+
+        return {
+            "simulated_seconds": self.clock.time() - started,
+            "wall_seconds": wall_seconds,
+            "orders": self.counter.orders,
+            "trades": self.counter.trades,
+            "orders_per_sec": self.counter.orders / wall_seconds if wall_seconds else 0.0,
+            "tickers": self.market.get_tickers(),
+            "bots": {symbol: self.positions.get_portfolio(f"BOT_MM_{symbol}")
+                     for symbol in self.market.list_all_securities()}
+        }
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    session_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 600
+
+    report = Backtest(ColumnarSeries.load(), days=days, session_seconds=session_seconds).run()
+    print(f"Simulated {report['simulated_seconds'] / 86400:.1f} days in {report['wall_seconds']:.2f}s: "
+          f"{report['orders']} orders, {report['trades']} trades, {report['orders_per_sec']:.0f} orders/s")
+    for ticker in report["tickers"]:
+        print(f"{ticker['symbol']:>6}: LTP {ticker['ltp']}  volume {ticker['volume']}")
+    for symbol, portfolio in report["bots"].items():
+        print(f"BOT_MM_{symbol}: realised {portfolio['realised_pnl']:.2f}  unrealised {portfolio['unrealised_pnl']:.2f}")
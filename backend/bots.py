@@ -0,0 +1,72 @@
+'''
+Trading bots.
+
+Each bot is written as a generator that performs one decision per step and then
+yields how many seconds it wants to sleep. The live server drives it with
+time.sleep (market_maker_bot); the backtester drives the very same generator on a
+simulated clock, so strategies behave identically in both and a simulated hour
+takes only as long as the engine needs to process it.
+'''
+import random
+import time
+from orderbook import Order
+
+
+def market_maker_steps(multi_order_book, stock_symbol, trader_id, rng=random):
+    """Market-making bot with wider range, aggressive matching, and consistent order placement."""
+    order_book = multi_order_book.get_order_book(stock_symbol)
+    max_orders = 10
+    active_orders = {}
+    range_width = 15  # ±15 from LTP for larger range
+
+    while True:
+        ltp = order_book.get_ltp()
+        if ltp is None:
+            ltp = rng.uniform(30, 50)
+
+        # Check and remove matched/canceled orders from active_orders
+        orders_to_remove = []
+        for order_id in active_orders:
+            if order_id not in order_book.orders:  # Order no longer in the order book
+                orders_to_remove.append(order_id)
+        for order_id in orders_to_remove:
+            del active_orders[order_id]
+            print(f"Market Maker ({trader_id}) removed matched/canceled order ID {order_id} from active_orders")
+
+        if len(active_orders) < max_orders and rng.random() < 0.7:
+            side = rng.choice(["BUY", "SELL"])
+            min_price = max(1, int(ltp - range_width))
+            max_price = int(ltp + range_width)
+            base_price = rng.randint(min_price, max_price)
+
+            best_bid_price = order_book.get_best_bid()
+            best_ask_price = order_book.get_best_ask()
+            price = base_price
+
+            # Very aggressive matching bias (exact match)
+            if side == "BUY" and best_ask_price is not None:
+                price = int(best_ask_price)  # Exact match with best ask
+            elif side == "SELL" and best_bid_price is not None:
+                price = int(best_bid_price)  # Exact match with best bid
+
+            price = max(1, price)
+            quantity = rng.randint(1, 20)
+
+            order = Order(side, price, quantity, "LIMIT", trader_id, timestamp=order_book.clock())
+            order_book.add_limit_order(order)
+            active_orders[order.orderId] = order
+            print(f"Market Maker ({trader_id}) placed {side} order on {stock_symbol}: {quantity} @ {price} (LTP: {ltp})")
+
+        elif active_orders and rng.random() < 0.3:  # Increased cancellation probability
+            order_id = rng.choice(list(active_orders.keys()))
+            order_book.cancel_order(order_id)
+            del active_orders[order_id]
+            print(f"Market Maker ({trader_id}) canceled order ID {order_id} on {stock_symbol}")
+
+        yield rng.uniform(1, 3)  # seconds until the next step
+
+
+def market_maker_bot(multi_order_book, stock_symbol, trader_id):
+    """Run the market maker in real time, for the live server's bot threads."""
+    for delay in market_maker_steps(multi_order_book, stock_symbol, trader_id):
+        time.sleep(delay)
@@ -0,0 +1,11 @@
+import os
+
+# Optional persistence of trades and order events (see persistence.py)
+PERSISTENCE_ENABLED = os.getenv("ASX_PERSISTENCE", "false").lower() in ("1", "true", "yes")
+PERSISTENCE_DB_PATH = os.getenv("ASX_DB_PATH", "asx.db")
+PERSISTENCE_FLUSH_SIZE = int(os.getenv("ASX_FLUSH_SIZE", "500"))  # rows per executemany batch
+PERSISTENCE_FLUSH_INTERVAL = float(os.getenv("ASX_FLUSH_INTERVAL", "0.5"))  # seconds
+PERSISTENCE_MAX_QUEUE = int(os.getenv("ASX_MAX_QUEUE", "10000"))  # rows buffered before backpressure
+
+# Name of the shared memory block exporting the top-of-book table to other processes (unset: in-process only)
+TICKERS_SHM_NAME = os.getenv("ASX_TICKERS_SHM") or None
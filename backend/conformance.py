@@ -0,0 +1,141 @@
+'''
+Differential conformance and throughput harness for order-book engines.
+
+A seeded random stream of commands (add, cancel, amend, expire) is replayed through
+the reference engine and a candidate engine. After every command the harness
+compares the command's return value, the trades and order events it produced, the
+aggregated depth, the per-order bid/ask lists and the LTP; the first divergence
+raises an AssertionError naming the command. The same streams, replayed without recording, give each engine's
+throughput relative to the reference.
+
+Run from the backend directory:
+python conformance.py [seed] [commands]
+'''
+import contextlib, os, random, sys, time
+from orderbook import Order, OrderBook, OrderBookListener
+from reference_engine import ReferenceOrderBook
+
+# engines checked when this module is run directly
+CANDIDATE_ENGINES = [OrderBook]
+
+
+class RecordingListener(OrderBookListener):
+    ''' Collects trades and order events as plain tuples that compare across engines. '''
+    def __init__(self):
+        self.events = []
+
+    def on_order_event(self, symbol, event, order, timestamp):
+        self.events.append((event, order.orderId))
+
+    def on_trade(self, symbol, buy_order, sell_order, price, quantity, timestamp):
+        self.events.append(("TRADE", buy_order.orderId, sell_order.orderId, price, quantity))
+
+    def take(self):
+        events, self.events = self.events, []
+        return events
+
+
+def random_commands(seed, count=2000, mid_price=100, spread=8, start=0):
+    """Seeded command stream; prices are tight around mid_price so most orders cross."""
+    rng = random.Random(seed)
+    now = start
+    next_id = 1
+    issued = [] # ids handed out so far, cancels and amends may target filled orders too
+    commands = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.6 or not issued:
+            side = rng.choice(["BUY", "SELL"])
+            price = mid_price + rng.randint(-spread, spread)
+            # whole-second expiries strictly in the future, so a 1s timer wheel and an exact scan agree
+            expire_at = now + rng.randint(1, 30) if rng.random() < 0.3 else None
+            commands.append(("add", next_id, side, price, rng.randint(1, 20), expire_at))
+            issued.append(next_id)
+            next_id += 1
+        elif roll < 0.75:
+            commands.append(("cancel", rng.choice(issued)))
+        elif roll < 0.9:
+            quantity = rng.randint(0, 20) if rng.random() < 0.7 else None
+            price = mid_price + rng.randint(-spread, spread) if rng.random() < 0.5 else None
+            commands.append(("amend", rng.choice(issued), quantity, price))
+        else:
+            now += rng.randint(1, 5)
+            commands.append(("expire", now))
+    return commands
+
+
+def run_commands(engine_class, commands, start=0, record=True):
+    """Replay commands through a fresh engine; returns the per-command log and the elapsed time."""
+    clock = [start]
+    engine = engine_class("TEST", lambda: clock[0])
+    recorder = RecordingListener()
+    if record:
+        engine.add_listener(recorder)
+
+    log = []
+    began = time.perf_counter()
+    # engines may print on every event, keep that out of the report and the timings
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for command in commands:
+            kind = command[0]
+            if kind == "add":
+                _, order_id, side, price, quantity, expire_at = command
+                order = Order(side, price, quantity, "LIMIT", f"TRADER_{order_id % 5}",
+                              "GTD" if expire_at else "GTC", expire_at)
+                order.orderId = order_id # stream-local ids so fills compare directly across engines
+                result = engine.add_limit_order(order)
+            elif kind == "cancel":
+                result = engine.cancel_order(command[1])
+            elif kind == "amend":
+                result = engine.amend_order(command[1], command[2], command[3])
+            else:
+                clock[0] = command[1]
+                result = sorted(order.orderId for order in engine.expire_orders(command[1]))
+
+            if record:
+                events = recorder.take()
+                if kind == "expire":
+                    events.sort() # expiry batches have no defined order
+                log.append((result, events, engine.depth(), engine.get_bids(), engine.get_asks(),
+                            engine.get_ltp()))
+    elapsed = time.perf_counter() - began
+    return log, elapsed
+
+
+def check_conformance(candidate, seed, count=2000, reference=ReferenceOrderBook):
+    """Raise AssertionError at the first command where candidate and reference disagree."""
+    commands = random_commands(seed, count)
+    expected, _ = run_commands(reference, commands)
+    actual, _ = run_commands(candidate, commands)
+    for index, (command, want, got) in enumerate(zip(commands, expected, actual)):
+        if want != got:
+            fields = ("result", "events", "depth", "bids", "asks", "ltp")
+            diffs = [f"{name}: expected {w!r}, got {g!r}" for name, w, g in zip(fields, want, got) if w != g]
+            raise AssertionError(f"{candidate.__name__} diverged from {reference.__name__} "
+                                 f"(seed {seed}) at command {index} {command}: " + "; ".join(diffs))
+
+
+def measure_throughput(engines, seed=0, count=20000, reference=ReferenceOrderBook):
+    """Commands per second for each engine and relative to the reference, same stream for all."""
+    commands = random_commands(seed, count)
+    report = {}
+    for engine_class in [reference] + [engine for engine in engines if engine is not reference]:
+        _, elapsed = run_commands(engine_class, commands, record=False)
+        report[engine_class.__name__] = {"commands_per_sec": count / elapsed}
+    baseline = report[reference.__name__]["commands_per_sec"]
+    for result in report.values():
+        result["relative"] = result["commands_per_sec"] / baseline
+    return report
+
+
+if __name__ == "__main__":
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    for engine_class in CANDIDATE_ENGINES:
+        for run_seed in range(seed, seed + 10):
+            check_conformance(engine_class, run_seed, count)
+        print(f"{engine_class.__name__}: identical to {ReferenceOrderBook.__name__} on seeds {seed}-{seed + 9}")
+
+    for name, result in measure_throughput(CANDIDATE_ENGINES, seed, count).items():
+        print(f"{name:>20}: {result['commands_per_sec']:>10.0f} commands/s  ({result['relative']:.2f}x reference)")
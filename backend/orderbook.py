@@ -3,8 +3,9 @@ The orderbook structure is as such:
 OrderSide
 Price (levels)
 Quantity
-Timestamp ( to be done)
+Timestamp
 OrderType: Limit; Stop; Market; FillOrKill(FOC); Good-till-Cancelled(GTC)
+TimeInForce: GTC (default); DAY (expires at the session close); GTD (expires at expire_at)
 
 orders are sent to the order book using such a self built data structure:
 # For a limit order
@@ -21,8 +22,21 @@ quote = {'type' : 'market',
          'trade_id' : 002}
 
 '''
-import time, random, itertools, threading
+import time, random, itertools, threading, math, struct, sys
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
 from threading import Lock
+from timerwheel import TimerWheel
+
+SESSION_CLOSE_HOUR = 16 # local hour at which DAY orders expire
+
+def day_expiry(timestamp):
+    ''' Session close following `timestamp`: today's close, or tomorrow's if already past it. '''
+    placed = datetime.fromtimestamp(timestamp)
+    close = placed.replace(hour=SESSION_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+    if placed >= close:
+        close += timedelta(days=1)
+    return close.timestamp()
 
 '''
 Defining individual orders.
@@ -34,7 +48,8 @@ class Order:
     # time of insertion of the order in the database
     order_counter = itertools.count(1)
 
-    def __init__(self, orderSide, price, quantity, orderType, trader_id=None):
+    def __init__(self, orderSide, price, quantity, orderType, trader_id=None, time_in_force="GTC", expire_at=None,
+                 timestamp=None):
         # define the order's unique order id
         self.orderId = next(Order.order_counter)
         # is it a BUY or SELL -side order?
@@ -44,8 +59,19 @@ class Order:
         # is it a Limit, Market, Stop order
         self.orderType = orderType
         self.trader_id = trader_id or "anonymous"  # Default to "anonymous" if None
-        # what is the time when the order is placed.
-        self.timestamp = time.time()
+        # what is the time when the order is placed (simulations pass their virtual time).
+        self.timestamp = time.time() if timestamp is None else timestamp
+        # how long the order may rest: GTC until filled/cancelled, DAY/GTD until expire_at
+        self.time_in_force = time_in_force
+        if time_in_force == "GTC":
+            expire_at = None
+        elif time_in_force == "DAY":
+            expire_at = day_expiry(self.timestamp)
+        elif time_in_force != "GTD":
+            raise ValueError(f"Unknown time in force: {time_in_force}")
+        elif expire_at is None:
+            raise ValueError("GTD orders need an expire_at time")
+        self.expire_at = expire_at
         # for the DLL-FIFO implementation
         self.next = None
         self.prev = None
@@ -181,12 +207,18 @@ class SkipList:
 
         return new_node
     
+    def getBestBidNode(self):
+        ''' Last (highest price) node, reached through the express lanes in O(log n). '''
+        current = self.head
+        for i in reversed(range(self.max_level)):
+            while current.forward[i]:
+                current = current.forward[i]
+        return current if current is not self.head else None
+
     def getBestBid(self):
         ''' Funciton to get the best bid/buy side order in the skiplist. '''
-        current = self.head
-        while current.forward[0]:
-            current = current.forward[0]
-        return current.price if current.price!=-(float('inf')) else None
+        node = self.getBestBidNode()
+        return node.price if node else None
     
     def getBestAsk(self):
         ''' Function to get the best ask/sell side order in the skiplist. '''
@@ -220,6 +252,105 @@ class SkipList:
             current = current.forward[0]
         return orders
 
+'''
+Observers of an OrderBook (persistence, positions, market data) subclass this and
+override only the hooks they need. Hooks run on the engine thread, so they must be
+cheap: anything slow (I/O, SQL) belongs on the listener's own worker thread.
+'''
+class OrderBookListener:
+    def on_order_event(self, symbol, event, order, timestamp):
+        """ Called on order lifecycle events: ACCEPTED, AMENDED, CANCELLED, FILLED, EXPIRED. """
+        pass
+
+    def on_trade(self, symbol, buy_order, sell_order, price, quantity, timestamp):
+        """ Called once per fill, before the quantities of both orders are reduced. """
+        pass
+
+    def on_book_update(self, symbol, order_book):
+        """ Called after an add, match or cancel that may have moved the top of book. """
+        pass
+
+'''
+What MultiSecurityOrderBook needs from a per-symbol engine, so faster engines can be
+swapped in for OrderBook. Engines are built as Engine(symbol, clock) and must expose
+`symbol`, `clock`, `orders` (orderId -> resting Order), `trades` and `listeners`.
+
+Semantics every engine must reproduce (checked by conformance.py against
+reference_engine.ReferenceOrderBook):
+- price-time priority, an incoming order is queued first and then crossed
+- crossing always takes the oldest order at the best bid and at the best ask,
+  trades print at the ask's price and are recorded as (bid id, ask id, price, qty)
+- amending the price or increasing the size loses time priority, shrinking keeps it
+- emptied price levels are removed
+'''
+class OrderBookEngine(ABC):
+    @abstractmethod
+    def add_limit_order(self, order):
+        """ Queue a limit order and match whatever now crosses. """
+
+    @abstractmethod
+    def cancel_order(self, orderId):
+        """ Remove a resting order; returns False if it is not in the book. """
+
+    @abstractmethod
+    def amend_order(self, orderId, quantity=None, price=None):
+        """ Change a resting order's size and/or price; returns False if it is not in the book. """
+
+    @abstractmethod
+    def depth(self, levels=None):
+        """ {"bids": [(price, quantity, order count)], "asks": [...]}, best price first. """
+
+    @abstractmethod
+    def expire_orders(self, now=None):
+        """ Remove DAY/GTD orders due at `now`; returns the expired orders. """
+
+    @abstractmethod
+    def get_bids(self):
+        """ Every resting bid as {"price", "quantity", "side"}, ascending price then time. """
+
+    @abstractmethod
+    def get_asks(self):
+        """ Every resting ask as {"price", "quantity", "side"}, ascending price then time. """
+
+    @abstractmethod
+    def get_ltp(self):
+        """ Price of the last trade, or None. """
+
+    def get_best_bid(self):
+        bids = self.depth(1)["bids"]
+        return bids[0][0] if bids else None
+
+    def get_best_ask(self):
+        asks = self.depth(1)["asks"]
+        return asks[0][0] if asks else None
+
+    def top_of_book(self):
+        """Return (best bid, bid size, best ask, ask size)."""
+        book = self.depth(1)
+        bid_price, bid_size = book["bids"][0][:2] if book["bids"] else (None, 0)
+        ask_price, ask_size = book["asks"][0][:2] if book["asks"] else (None, 0)
+        return (bid_price, bid_size, ask_price, ask_size)
+
+    def add_listener(self, listener):
+        """Register an OrderBookListener for trades and order lifecycle events."""
+        self.listeners.append(listener)
+
+    def _emit_order_event(self, event, order):
+        if self.listeners:
+            event_time = self.clock()
+            for listener in self.listeners:
+                listener.on_order_event(self.symbol, event, order, event_time)
+
+    def _emit_trade(self, buy_order, sell_order, price, quantity):
+        if self.listeners:
+            trade_time = self.clock()
+            for listener in self.listeners:
+                listener.on_trade(self.symbol, buy_order, sell_order, price, quantity, trade_time)
+
+    def _emit_book_update(self):
+        for listener in self.listeners:
+            listener.on_book_update(self.symbol, self)
+
 '''
 Create an OrderBook using a hashset, for efficient lookup addition, deletion. 
 O(1) order retrieval.
@@ -227,14 +358,22 @@ O(1) order retrieval.
 Only working with Limit orders right now, with the goal of executing partial
 order filling.
 '''
-class OrderBook:
-    def __init__(self):
+class OrderBook(OrderBookEngine):
+    def __init__(self, symbol=None, clock=time.time):
         ''' Initialise the order book with bid and ask skip lists. '''
+        self.symbol = symbol
+        self.clock = clock # source of "now" for order expiry
+        # DAY/GTD expiries, O(1) schedule and cancel instead of scanning self.orders
+        self.expiry_wheel = TimerWheel(start=clock())
         self.bids = SkipList() # for buy orders (max price first)
         self.asks = SkipList() # for sell orders (min price first)
         self.orders = {} # create a hashset for orderId lookup.
         self.trades = []
         self.ltp = None # adding an ltp attribute
+        self.listeners = [] # OrderBookListener instances notified of trades and order events
+        # bot, expiry and request threads all mutate the book; re-entrant because
+        # amend/match call back into add/cancel
+        self.lock = threading.RLock()
 
     def get_bids(self):
         """Return all bid orders as a flat list of dicts."""
@@ -265,19 +404,24 @@ class OrderBook:
     # helper function to add a limit order:
     def add_limit_order(self, order):
         """Add an order to the order book."""
-        if order.side == "BUY":
-            price_node = self.bids.insertPrice(order.price)
-        else:
-            price_node = self.asks.insertPrice(order.price)
+        with self.lock:
+            if order.side == "BUY":
+                price_node = self.bids.insertPrice(order.price)
+            else:
+                price_node = self.asks.insertPrice(order.price)
 
-        # Only add order if it's not already in the order book
-        if order.orderId not in self.orders:
-            price_node.orders.addOrder(order)
-            self.orders[order.orderId] = order
-            print(f"Added LIMIT Order: {order.side} {order.quantity} @ {order.price}")
+            # Only add order if it's not already in the order book
+            if order.orderId not in self.orders:
+                price_node.orders.addOrder(order)
+                self.orders[order.orderId] = order
+                if order.expire_at is not None:
+                    self.expiry_wheel.schedule(order.orderId, order.expire_at)
+                print(f"Added LIMIT Order: {order.side} {order.quantity} @ {order.price}")
+                self._emit_order_event("ACCEPTED", order)
 
-        # Continuously match orders after each insertion
-        self.matchAllOrders()
+            # Continuously match orders after each insertion
+            self.matchAllOrders()
+            self._emit_book_update()
 
     def process_order(self, stock, quantity, order_type, price):
     # Placeholder logic (Replace with actual order processing)
@@ -303,6 +447,33 @@ class OrderBook:
     
     def get_ltp(self):
         return self.ltp
+
+    def top_of_book(self):
+        """Return (best bid, bid size, best ask, ask size), skipping empty price levels."""
+        bid_node = self.bids.getBestBidNode()
+        if bid_node and bid_node.orders.size == 0:
+            # an emptied level was left in place, fall back to the last non-empty one
+            bid_node, current = None, self.bids.head.forward[0]
+            while current:
+                if current.orders.size > 0:
+                    bid_node = current
+                current = current.forward[0]
+
+        ask_node = self.asks.head.forward[0]
+        while ask_node and ask_node.orders.size == 0:
+            ask_node = ask_node.forward[0]
+
+        return (bid_node.price if bid_node else None, self.level_quantity(bid_node),
+                ask_node.price if ask_node else None, self.level_quantity(ask_node))
+
+    def level_quantity(self, price_node):
+        """Total resting quantity at a price level."""
+        total = 0
+        current = price_node.orders.head if price_node else None
+        while current:
+            total += current.quantity
+            current = current.next
+        return total
     
     def execute_trade(self, order, match_order, trade_qty):
         """Execute a trade between two orders."""
@@ -325,6 +496,10 @@ class OrderBook:
 
         # Record the trade
         self.trades.append((order.orderId, match_order.orderId, trade_price, trade_qty))
+        if order.side == "BUY":
+            self._emit_trade(order, match_order, trade_price, trade_qty)
+        else:
+            self._emit_trade(match_order, order, trade_price, trade_qty)
 
         # Update Quantities
         order.quantity -= trade_qty
@@ -361,26 +536,115 @@ class OrderBook:
 
     def cancelOrder(self, orderId, check_price_level=False):
         """Cancel an order and remove the price level if empty."""
-        if orderId in self.orders:
-            order = self.orders[orderId]
-
-            # Identify whether it's a BUY or SELL order
-            if order.side == "BUY":
-                price_node = self.bids.insertPrice(order.price)
+        with self.lock:
+            if orderId in self.orders:
+                order = self.orders[orderId]
+
+                # Identify whether it's a BUY or SELL order
+                if order.side == "BUY":
+                    price_node = self.bids.insertPrice(order.price)
+                else:
+                    price_node = self.asks.insertPrice(order.price)
+
+                # Remove the order from the FIFO queue
+                price_node.orders.removeOrder(order)
+                del self.orders[orderId]
+                if order.expire_at is not None:
+                    self.expiry_wheel.cancel(orderId)
+
+                # Check if the price level is empty
+                if check_price_level:
+                    self.check_price_level(order.side, order.price)
+
+                # a fully filled order leaves the book through here as well
+                if order.quantity == 0:
+                    self._emit_order_event("FILLED", order)
+                else:
+                    self._emit_order_event("CANCELLED", order)
+                    self._emit_book_update() # fills report the new top once matching is done
+                print(f"Order {orderId} cancelled")
+
+
+    def cancel_order(self, orderId):
+        """Cancel a resting order and drop its price level if it empties."""
+        with self.lock:
+            if orderId not in self.orders:
+                return False
+            self.cancelOrder(orderId, check_price_level=True)
+            return True
+
+    def amend_order(self, orderId, quantity=None, price=None):
+        """Amend a resting order in place; a new price or a larger size re-queues it at the back."""
+        with self.lock:
+            order = self.orders.get(orderId)
+            if order is None:
+                return False
+            quantity = order.quantity if quantity is None else quantity
+            price = order.price if price is None else price
+            if quantity <= 0:
+                return self.cancel_order(orderId)
+
+            if price == order.price and quantity <= order.quantity:
+                # shrinking keeps time priority
+                order.quantity = quantity
             else:
-                price_node = self.asks.insertPrice(order.price)
+                book = self.bids if order.side == "BUY" else self.asks
+                book.insertPrice(order.price).orders.removeOrder(order)
+                self.check_price_level(order.side, order.price)
+                order.price, order.quantity = price, quantity
+                book.insertPrice(price).orders.addOrder(order)
 
-            # Remove the order from the FIFO queue
-            price_node.orders.removeOrder(order)
-            del self.orders[orderId]
+            self._emit_order_event("AMENDED", order)
+            self.matchAllOrders()
+            self._emit_book_update()
+            return True
 
-            # Check if the price level is empty
-            if check_price_level:
-                self.check_price_level(order.side, order.price)
+    def depth(self, levels=None):
+        """Aggregated (price, quantity, order count) per level, best price first."""
+        def aggregate(node):
+            return (node.price, self.level_quantity(node), node.orders.size)
+
+        bids, current = [], self.bids.head.forward[0]
+        while current:
+            if current.orders.size > 0:
+                bids.append(aggregate(current))
+            current = current.forward[0]
+        bids.reverse() # the bid skip list is in ascending price order
 
-            print(f"Order {orderId} cancelled")
+        asks, current = [], self.asks.head.forward[0]
+        while current and (levels is None or len(asks) < levels):
+            if current.orders.size > 0:
+                asks.append(aggregate(current))
+            current = current.forward[0]
+
+        return {"bids": bids[:levels], "asks": asks}
+
+    def expire_orders(self, now=None):
+        """Remove every DAY/GTD order whose expiry has passed, then drop the levels it emptied."""
+        with self.lock:
+            expired_ids = self.expiry_wheel.advance(self.clock() if now is None else now)
+            expired, touched_levels = [], set()
+            for orderId in expired_ids:
+                order = self.orders.pop(orderId, None)
+                if order is None:
+                    continue
+                if order.side == "BUY":
+                    price_node = self.bids.insertPrice(order.price)
+                else:
+                    price_node = self.asks.insertPrice(order.price)
+                price_node.orders.removeOrder(order)
+                touched_levels.add((order.side, order.price))
+                expired.append(order)
+                self._emit_order_event("EXPIRED", order)
+
+            # one level check per distinct price, not per expired order
+            for side, price in touched_levels:
+                self.check_price_level(side, price)
+            if expired:
+                self._emit_book_update()
+                print(f"Expired {len(expired)} orders")
+            return expired
 
-    
     def check_price_level(self, side, price):
         """Remove the price level from the skip list if it's empty."""
         if side == "BUY":
@@ -397,92 +661,95 @@ class OrderBook:
 
     def matchOrder(self, order):
         """Match limit orders with partial fills, using FIFO logic."""
+        with self.lock:
 
-        # 🔹 BUY Order Logic
-        if order.side == "BUY":
-            while order.quantity > 0:
-                best_ask_price = self.get_best_ask()
-                # Exit if no matching SELL orders
-                if best_ask_price is None or best_ask_price > order.price:
-                    # No match found - add order to the book
-                    self.add_limit_order(order)
-                    return
-
-                ask_node = self.asks.head.forward[0]
-                matched = False  # Track if the order is matched
-
-                while ask_node and ask_node.price <= order.price:
-                    if ask_node.orders.size == 0:
-                        break
-
-                    with ask_node.lock:
-                        ask_orders = ask_node.orders
-                        while order.quantity > 0 and ask_orders.size > 0:
-                            match_order = ask_orders.getOldestOrder()
-                            trade_qty = min(order.quantity, match_order.quantity)
-                            self.execute_trade(order, match_order, trade_qty)
-                            matched = True
-
-                            if order.quantity == 0:
+            # 🔹 BUY Order Logic
+            if order.side == "BUY":
+                while order.quantity > 0:
+                    best_ask_price = self.get_best_ask()
+                    # Exit if no matching SELL orders
+                    if best_ask_price is None or best_ask_price > order.price:
+                        # No match found - add order to the book
+                        self.add_limit_order(order)
+                        return
+
+                    ask_node = self.asks.head.forward[0]
+                    matched = False  # Track if the order is matched
+
+                    while ask_node and ask_node.price <= order.price:
+                        if ask_node.orders.size == 0:
+                            break
+
+                        with ask_node.lock:
+                            ask_orders = ask_node.orders
+                            while order.quantity > 0 and ask_orders.size > 0:
+                                match_order = ask_orders.getOldestOrder()
+                                trade_qty = min(order.quantity, match_order.quantity)
+                                self.execute_trade(order, match_order, trade_qty)
+                                matched = True
+
+                                if order.quantity == 0:
+                                    break
+
+                            if ask_orders.size == 0:
+                                ask_node = ask_node.forward[0]
+                            else:
                                 break
 
-                        if ask_orders.size == 0:
-                            ask_node = ask_node.forward[0]
-                        else:
+                        if order.quantity == 0 or ask_node is None:
+                            break
+
+                    # If no match found, add order to the book
+                    if not matched and order.quantity > 0:
+                        self.add_limit_order(order)
+                        return
+
+            # 🔹 SELL Order Logic
+            else:
+                while order.quantity > 0:
+                    best_bid_price = self.get_best_bid()
+                    # Exit if no matching BUY orders
+                    if best_bid_price is None or best_bid_price < order.price:
+                        # No match found - add order to the book
+                        self.add_limit_order(order)
+                        return
+
+                    bid_node = self.bids.head.forward[0]
+                    matched = False  # Track if the order is matched
+
+                    while bid_node and bid_node.price >= order.price:
+                        if bid_node.orders.size == 0:
                             break
 
-                    if order.quantity == 0 or ask_node is None:
-                        break
+                        with bid_node.lock:
+                            bid_orders = bid_node.orders
+                            while order.quantity > 0 and bid_orders.size > 0:
+                                match_order = bid_orders.getOldestOrder()
+                                trade_qty = min(order.quantity, match_order.quantity)
+                                self.execute_trade(order, match_order, trade_qty)
+                                matched = True
 
-                # If no match found, add order to the book
-                if not matched and order.quantity > 0:
-                    self.add_limit_order(order)
-                    return
+                                if order.quantity == 0:
+                                    break
 
-        # 🔹 SELL Order Logic
-        else:
-            while order.quantity > 0:
-                best_bid_price = self.get_best_bid()
-                # Exit if no matching BUY orders
-                if best_bid_price is None or best_bid_price < order.price:
-                    # No match found - add order to the book
-                    self.add_limit_order(order)
-                    return
-
-                bid_node = self.bids.head.forward[0]
-                matched = False  # Track if the order is matched
-
-                while bid_node and bid_node.price >= order.price:
-                    if bid_node.orders.size == 0:
-                        break
-
-                    with bid_node.lock:
-                        bid_orders = bid_node.orders
-                        while order.quantity > 0 and bid_orders.size > 0:
-                            match_order = bid_orders.getOldestOrder()
-                            trade_qty = min(order.quantity, match_order.quantity)
-                            self.execute_trade(order, match_order, trade_qty)
-                            matched = True
-
-                            if order.quantity == 0:
+                            if bid_orders.size == 0:
+                                bid_node = bid_node.forward[0]
+                            else:
                                 break
 
-                        if bid_orders.size == 0:
-                            bid_node = bid_node.forward[0]
-                        else:
+                        if order.quantity == 0 or bid_node is None:
                             break
 
-                    if order.quantity == 0 or bid_node is None:
-                        break
+                    # If no match found, add order to the book
+                    if not matched and order.quantity > 0:
+                        self.add_limit_order(order)
+                        return
 
-                # If no match found, add order to the book
-                if not matched and order.quantity > 0:
-                    self.add_limit_order(order)
-                    return
-
-        # If the order is partially filled, add the remaining volume to the book
-        if order.quantity > 0 and order.orderId not in self.orders:
-            self.add_limit_order(order)
+            # If the order is partially filled, add the remaining volume to the book
+            if order.quantity > 0 and order.orderId not in self.orders:
+                self.add_limit_order(order)
+            else:
+                self._emit_book_update()
 
     def matchAllOrders(self):
         """Continuously match orders until no valid cross exists, with thread safety."""
@@ -498,6 +765,14 @@ class OrderBook:
             bid_node = self.bids.insertPrice(best_bid_price)
             ask_node = self.asks.insertPrice(best_ask_price)
 
+            # a level emptied by a plain cancelOrder would otherwise spin here forever
+            if bid_node.orders.size == 0 or ask_node.orders.size == 0:
+                if bid_node.orders.size == 0:
+                    self.check_price_level("BUY", best_bid_price)
+                if ask_node.orders.size == 0:
+                    self.check_price_level("SELL", best_ask_price)
+                continue
+
             # Match FIFO orders at the best price
             while bid_node.orders.size > 0 and ask_node.orders.size > 0:
                 bid_order = bid_node.orders.getOldestOrder()
@@ -513,16 +788,168 @@ class OrderBook:
                 if ask_node.orders.size == 0:
                     self.check_price_level("SELL", best_ask_price)
 
+'''
+Top-of-book table: one fixed-size row per security with best bid/ask, their sizes,
+LTP, traded volume and a sequence number. Rows are packed with struct into a flat
+buffer, so a /tickers read is one unpack per symbol instead of a walk of every book.
+
+The buffer is a bytearray, or a multiprocessing SharedMemory block when a name is
+given, in which case other processes can TopOfBookTable.attach(name) and read it.
+
+Layout: header (symbol count) | symbol names (16 bytes each) | rows
+Each row is guarded by its sequence field like a seqlock: the writer makes it odd
+while the row is being written and even once done, readers retry on odd or changed.
+'''
+class TopOfBookTable(OrderBookListener):
+    HEADER = struct.Struct("<I")
+    NAME = struct.Struct("16s")
+    ROW = struct.Struct("<Qddqqdq") # seq, bid, ask, bid_size, ask_size, ltp, volume
+
+    def __init__(self, symbols, shm_name=None, buffer=None):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.rows_offset = self.HEADER.size + self.NAME.size * len(self.symbols)
+        self.shm = None
+        self.owner = buffer is None
+        self.lock = Lock() # serialises writers, readers never take it
+        # writer-side state per row, so unchanged tops don't touch the buffer
+        self.tops = [(None, 0, None, 0)] * len(self.symbols)
+        self.ltps = [None] * len(self.symbols)
+        self.volumes = [0] * len(self.symbols)
+        self.seqs = [0] * len(self.symbols)
+        self.traded = [False] * len(self.symbols) # LTP/volume changed since the row was written
+
+        if buffer is None:
+            size = self.rows_offset + self.ROW.size * len(self.symbols)
+            if shm_name:
+                from multiprocessing import shared_memory
+                self.shm = shared_memory.SharedMemory(name=shm_name, create=True, size=size)
+                buffer = self.shm.buf
+            else:
+                buffer = bytearray(size)
+            self.HEADER.pack_into(buffer, 0, len(self.symbols))
+            for i, symbol in enumerate(self.symbols):
+                self.NAME.pack_into(buffer, self.HEADER.size + i * self.NAME.size, symbol.encode())
+        self.buffer = buffer
+        if self.owner:
+            for i in range(len(self.symbols)):
+                self._write_row(i)
+
+    @classmethod
+    def attach(cls, shm_name):
+        """Open a read-only view of a table exported by another process."""
+        from multiprocessing import resource_tracker, shared_memory
+        # a tracked segment is unlinked when this process exits, pulling it from under the owner
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=shm_name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        count = cls.HEADER.unpack_from(shm.buf, 0)[0]
+        symbols = [cls.NAME.unpack_from(shm.buf, cls.HEADER.size + i * cls.NAME.size)[0].rstrip(b"\0").decode()
+                   for i in range(count)]
+        table = cls(symbols, buffer=shm.buf)
+        table.shm = shm
+        return table
+
+    def close(self):
+        """Release the shared memory block (and remove it if this table created it)."""
+        with self.lock:
+            if self.shm is not None:
+                self.buffer = None # later updates become no-ops instead of writing to freed memory
+                self.shm.close()
+                if self.owner:
+                    try:
+                        self.shm.unlink()
+                    except FileNotFoundError:
+                        pass # already removed from outside, nothing left to release
+                self.shm = None
+
+    def _write_row(self, i):
+        bid, bid_size, ask, ask_size = self.tops[i]
+        offset = self.rows_offset + i * self.ROW.size
+        seq = self.seqs[i]
+        # odd sequence while writing, readers retry until it is even again
+        struct.pack_into("<Q", self.buffer, offset, 2 * seq + 1)
+        self.ROW.pack_into(self.buffer, offset, 2 * seq + 1, _nan(bid), _nan(ask), bid_size, ask_size,
+                           _nan(self.ltps[i]), self.volumes[i])
+        struct.pack_into("<Q", self.buffer, offset, 2 * seq + 2)
+        self.seqs[i] = seq + 1
+
+    def on_trade(self, symbol, buy_order, sell_order, price, quantity, timestamp):
+        i = self.index.get(symbol)
+        if i is not None:
+            with self.lock:
+                self.ltps[i] = price
+                self.volumes[i] += quantity
+                self.traded[i] = True
+
+    def on_book_update(self, symbol, order_book):
+        i = self.index.get(symbol)
+        if i is None:
+            return
+        top = order_book.top_of_book()
+        with self.lock:
+            if self.buffer is None:
+                return # closed
+            if top == self.tops[i] and not self.traded[i]:
+                return # nothing moved, keep the sequence number
+            self.tops[i] = top
+            self.traded[i] = False
+            self._write_row(i)
+
+    def read(self, symbol):
+        """Consistent snapshot of one row as a dict, or None for unknown symbols."""
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        offset = self.rows_offset + i * self.ROW.size
+        while True:
+            row = self.ROW.unpack_from(self.buffer, offset)
+            if row[0] % 2 == 0 and struct.unpack_from("<Q", self.buffer, offset)[0] == row[0]:
+                break
+        seq, bid, ask, bid_size, ask_size, ltp, volume = row
+        return {
+            "symbol": symbol,
+            "bid": _none(bid),
+            "bid_size": bid_size,
+            "ask": _none(ask),
+            "ask_size": ask_size,
+            "ltp": _none(ltp),
+            "volume": volume,
+            "seq": seq // 2
+        }
+
+    def snapshot(self):
+        """Every symbol's row, in table order."""
+        return [self.read(symbol) for symbol in self.symbols]
+
+
+def _nan(value):
+    return float("nan") if value is None else float(value)
+
+def _none(value):
+    return None if math.isnan(value) else value
+
 # multi security OrderBook, which basically creates instances of orderbooks for the securities
 class MultiSecurityOrderBook:
-    def __init__(self):
+    def __init__(self, shm_name=None, clock=time.time, engine=OrderBook):
         """Initialize order books for AAPL, TSLA, and MSFT."""
         # creating instances, using a dictionary for each stock's orderbooks
+        # any OrderBookEngine subclass can be used per symbol in place of OrderBook
         self.order_books = {
-            "AAPL": OrderBook(),
-            "TSLA": OrderBook(),
-            "MSFT": OrderBook()
+            "AAPL": engine("AAPL", clock),
+            "TSLA": engine("TSLA", clock),
+            "MSFT": engine("MSFT", clock)
         }
+        # shared top-of-book table fed by every book; exported to shared memory if shm_name is set
+        self.top_of_book = TopOfBookTable(self.order_books.keys(), shm_name)
+        self.add_listener(self.top_of_book)
+
+    def add_listener(self, listener):
+        """Register an OrderBookListener on every security's order book."""
+        for order_book in self.order_books.values():
+            order_book.add_listener(listener)
 
     def get_or_create_order_book(self, symbol):
         """Get the order book for a specific security or return None if it doesn't exist."""
@@ -533,7 +960,6 @@ class MultiSecurityOrderBook:
         order_book = self.get_or_create_order_book(symbol)
         if order_book:
             order_book.add_limit_order(order)
-            order_book.matchAllOrders()
             return f"Order added to {symbol}"
         else:
             return f"Error: {symbol} is not a valid security"
@@ -546,6 +972,14 @@ class MultiSecurityOrderBook:
         """List all available securities."""
         return list(self.order_books.keys())
 
+    def expire_orders(self, now=None):
+        """Expire due DAY/GTD orders in every book; returns {symbol: expired orders}."""
+        return {symbol: order_book.expire_orders(now) for symbol, order_book in self.order_books.items()}
+
+    def get_tickers(self):
+        """Best bid/ask, sizes, LTP and volume of every security from the top-of-book table."""
+        return self.top_of_book.snapshot()
+
 
         
 '''
@@ -0,0 +1,228 @@
+'''
+Persistence of trades and order lifecycle events.
+
+The engine thread never touches the database. TradeStore is an OrderBookListener
+whose hooks only turn the event into a tuple and put it on a bounded queue; a
+background writer thread drains the queue and writes rows in batches:
+
+engine thread --on_trade / on_order_event--> queue --writer thread--> executemany + commit
+
+A batch is flushed when it reaches `flush_size` rows or when `flush_interval`
+seconds have passed since its first row, whichever comes first. When the writer
+falls behind and the queue is full, the engine either waits for room
+(block_on_full=True, backpressure) or the row is dropped and counted. Rows that
+arrive after close() are dropped and counted too, since nothing drains the queue.
+
+Any DB-API 2.0 target works: pass a `connect` callable returning a connection and
+the module's `paramstyle`. SQLite is the default.
+'''
+import queue, sqlite3, threading, time
+from orderbook import OrderBookListener
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS trades (
+        id INTEGER PRIMARY KEY,
+        symbol TEXT NOT NULL,
+        buy_order_id INTEGER NOT NULL,
+        sell_order_id INTEGER NOT NULL,
+        buy_trader_id TEXT NOT NULL,
+        sell_trader_id TEXT NOT NULL,
+        price REAL NOT NULL,
+        quantity INTEGER NOT NULL,
+        executed_at REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS order_events (
+        id INTEGER PRIMARY KEY,
+        order_id INTEGER NOT NULL,
+        symbol TEXT NOT NULL,
+        event TEXT NOT NULL,
+        side TEXT NOT NULL,
+        price REAL NOT NULL,
+        quantity INTEGER NOT NULL,
+        order_type TEXT NOT NULL,
+        time_in_force TEXT NOT NULL,
+        expire_at REAL,
+        trader_id TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )""",
+    # portfolio and account pages look trades up by trader, charts by symbol and time
+    "CREATE INDEX IF NOT EXISTS idx_trades_buy_trader ON trades (buy_trader_id, symbol)",
+    "CREATE INDEX IF NOT EXISTS idx_trades_sell_trader ON trades (sell_trader_id, symbol)",
+    "CREATE INDEX IF NOT EXISTS idx_trades_symbol_time ON trades (symbol, executed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_order_events_trader ON order_events (trader_id, symbol)",
+    "CREATE INDEX IF NOT EXISTS idx_order_events_order ON order_events (order_id)",
+]
+
+TRADE_COLUMNS = ("symbol", "buy_order_id", "sell_order_id", "buy_trader_id",
+                 "sell_trader_id", "price", "quantity", "executed_at")
+ORDER_EVENT_COLUMNS = ("order_id", "symbol", "event", "side", "price",
+                       "quantity", "order_type", "time_in_force", "expire_at",
+                       "trader_id", "created_at")
+
+_STOP = object() # sentinel telling the writer thread to flush and exit
+
+
+def placeholders(paramstyle, count):
+    """ Build the parameter markers of an INSERT for the given DB-API paramstyle. """
+    if paramstyle == "qmark":
+        return ", ".join(["?"] * count)
+    if paramstyle in ("format", "pyformat"):
+        return ", ".join(["%s"] * count)
+    if paramstyle == "numeric":
+        return ", ".join(f":{i}" for i in range(1, count + 1))
+    raise ValueError(f"Unsupported paramstyle: {paramstyle}")
+
+
+def insert_statement(table, columns, paramstyle):
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders(paramstyle, len(columns))})"
+
+
+class TradeStore(OrderBookListener):
+    def __init__(self, db_path="asx.db", connect=None, paramstyle="qmark",
+                 flush_size=500, flush_interval=0.5, max_queue=10000, block_on_full=True):
+        ''' Configure the store; call start() to launch the writer thread. '''
+        # the connection is opened inside the writer thread (sqlite3 connections are thread bound)
+        self.connect = connect or (lambda: sqlite3.connect(db_path))
+        self.paramstyle = paramstyle
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.block_on_full = block_on_full
+        self.dropped = 0 # rows discarded: queue full with block_on_full False, or store closed
+        self.written = 0 # rows committed so far
+        self.error = None # last exception raised by the writer thread
+        self.insert_trade = insert_statement("trades", TRADE_COLUMNS, paramstyle)
+        self.insert_order_event = insert_statement("order_events", ORDER_EVENT_COLUMNS, paramstyle)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._ready = threading.Event()
+        self._thread = None
+        self.closed = False
+
+    def start(self):
+        """Start the background writer; returns once the schema exists."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="TradeStoreWriter", daemon=True)
+            self._thread.start()
+            self._ready.wait()
+            if self.error:
+                raise self.error
+        return self
+
+    def close(self):
+        """Flush everything still queued and stop the writer thread; later rows are dropped."""
+        self.closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        # rows that raced in behind the sentinel have no writer left, discard them so flush() returns
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.dropped += 1
+            self._queue.task_done()
+
+    def flush(self):
+        """Block until every row queued so far has been committed."""
+        self._queue.join()
+
+    # OrderBookListener hooks, these run on the engine thread: enqueue only.
+    def on_trade(self, symbol, buy_order, sell_order, price, quantity, timestamp):
+        self._put((self.insert_trade, (symbol, buy_order.orderId, sell_order.orderId,
+                                       buy_order.trader_id, sell_order.trader_id,
+                                       price, quantity, timestamp)))
+
+    def on_order_event(self, symbol, event, order, timestamp):
+        self._put((self.insert_order_event, (order.orderId, symbol, event, order.side,
+                                             order.price, order.quantity, order.orderType,
+                                             order.time_in_force, order.expire_at,
+                                             order.trader_id, timestamp)))
+
+    def _put(self, row):
+        if self.closed:
+            self.dropped += 1 # the writer is gone, blocking here would stall the engine for good
+        elif self.block_on_full:
+            self._queue.put(row) # backpressure: wait for the writer to make room
+        else:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self):
+        try:
+            conn = self.connect()
+            cursor = conn.cursor()
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            conn.commit()
+        except Exception as e:
+            self.error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        batch = {} # statement -> list of parameter tuples
+        pending = 0 # rows in the current batch
+        deadline = None # time at which the current batch must be flushed
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                running = False
+                self._queue.task_done()
+            elif item is not None:
+                statement, params = item
+                batch.setdefault(statement, []).append(params)
+                pending += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if pending and (not running or pending >= self.flush_size or time.monotonic() >= deadline):
+                self._write_batch(conn, batch)
+                for _ in range(pending):
+                    self._queue.task_done()
+                batch, pending, deadline = {}, 0, None
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        """Write one batch in a single transaction, one executemany per statement."""
+        try:
+            cursor = conn.cursor()
+            for statement, rows in batch.items():
+                cursor.executemany(statement, rows)
+            conn.commit()
+            self.written += sum(len(rows) for rows in batch.values())
+        except Exception as e:
+            conn.rollback()
+            self.error = e
+            print(f"TradeStore failed to write batch: {e}")
+
+    def trades_for_trader(self, trader_id, symbol=None, limit=100):
+        """Most recent trades on either side for a trader, read on a separate connection."""
+        query = ("SELECT symbol, buy_order_id, sell_order_id, buy_trader_id, sell_trader_id, "
+                 "price, quantity, executed_at FROM trades WHERE (buy_trader_id = {0} OR sell_trader_id = {0})")
+        params = [trader_id, trader_id]
+        if symbol:
+            query += " AND symbol = {0}"
+            params.append(symbol)
+        query += " ORDER BY executed_at DESC LIMIT {0}"
+        params.append(limit)
+        # expand each marker in turn so numeric styles (:1, :2, ...) stay correctly numbered
+        markers = placeholders(self.paramstyle, len(params)).split(", ")
+        for marker in markers:
+            query = query.replace("{0}", marker, 1)
+
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [dict(zip(TRADE_COLUMNS, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
@@ -0,0 +1,110 @@
+'''
+Per-trader positions and P&L, kept up to date incrementally on every fill.
+
+PositionKeeper listens to the order books, so nothing ever replays OrderBook.trades:
+each fill updates exactly two Position objects (buyer and seller) in O(1).
+
+Position accounting uses average cost:
+- a fill in the direction of the position (or from flat) moves the average cost
+- a fill against the position realises (price - avg_cost) on the closed quantity
+- a fill larger than the position closes it and opens the remainder at the fill price
+
+Unrealised P&L is marked to the security's get_ltp() lazily: a Position remembers
+the price it was last marked at and only recomputes when that price (or the
+position itself) changes. Reading a trader's portfolio is O(symbols held).
+'''
+import threading
+from orderbook import OrderBookListener
+
+
+class Position:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.quantity = 0 # net quantity: positive is long, negative is short
+        self.avg_cost = 0.0 # average price of the open quantity
+        self.realised_pnl = 0.0
+        self.unrealised_pnl = 0.0
+        self.mark_price = None # LTP the unrealised P&L was last computed at
+
+    def apply_fill(self, side, price, quantity):
+        """Apply one fill to the position."""
+        signed_qty = quantity if side == "BUY" else -quantity
+
+        if self.quantity == 0 or (self.quantity > 0) == (signed_qty > 0):
+            # opening or adding to the position
+            new_qty = self.quantity + signed_qty
+            self.avg_cost = (self.avg_cost * abs(self.quantity) + price * quantity) / abs(new_qty)
+            self.quantity = new_qty
+        else:
+            # reducing, closing or flipping the position
+            closed_qty = min(quantity, abs(self.quantity))
+            direction = 1 if self.quantity > 0 else -1
+            self.realised_pnl += (price - self.avg_cost) * closed_qty * direction
+            self.quantity += signed_qty
+            if self.quantity == 0:
+                self.avg_cost = 0.0
+            elif (self.quantity > 0) != (direction > 0):
+                self.avg_cost = price # flipped: the remainder was opened at this fill
+
+        self.mark_price = None # position changed, re-mark on next read
+
+    def mark(self, ltp):
+        """Recompute unrealised P&L only if the LTP moved since the last mark."""
+        if ltp is not None and ltp != self.mark_price:
+            self.mark_price = ltp
+            self.unrealised_pnl = (ltp - self.avg_cost) * self.quantity
+        return self.unrealised_pnl
+
+    def to_dict(self):
+        return {
+            "symbol": self.symbol,
+            "quantity": self.quantity,
+            "avg_cost": self.avg_cost,
+            "realised_pnl": self.realised_pnl,
+            "unrealised_pnl": self.unrealised_pnl,
+            "ltp": self.mark_price
+        }
+
+
+class PositionKeeper(OrderBookListener):
+    def __init__(self, multi_order_book):
+        ''' Track positions for every trader on the securities of a MultiSecurityOrderBook. '''
+        self.multi_order_book = multi_order_book
+        self.positions = {} # trader_id -> {symbol: Position}
+        self.lock = threading.Lock() # fills arrive from bot threads and request threads
+
+    def _position(self, trader_id, symbol):
+        holdings = self.positions.setdefault(trader_id, {})
+        position = holdings.get(symbol)
+        if position is None:
+            position = holdings[symbol] = Position(symbol)
+        return position
+
+    def on_trade(self, symbol, buy_order, sell_order, price, quantity, timestamp):
+        with self.lock:
+            self._position(buy_order.trader_id, symbol).apply_fill("BUY", price, quantity)
+            self._position(sell_order.trader_id, symbol).apply_fill("SELL", price, quantity)
+
+    def get_position(self, trader_id, symbol):
+        """Return a trader's Position in a symbol, or None if they never traded it."""
+        return self.positions.get(trader_id, {}).get(symbol)
+
+    def get_portfolio(self, trader_id):
+        """Positions of a trader marked to the current LTPs, plus P&L totals."""
+        with self.lock:
+            holdings = []
+            realised = unrealised = 0.0
+            for symbol, position in self.positions.get(trader_id, {}).items():
+                order_book = self.multi_order_book.get_order_book(symbol)
+                position.mark(order_book.get_ltp() if order_book else None)
+                realised += position.realised_pnl
+                unrealised += position.unrealised_pnl
+                holdings.append(position.to_dict())
+
+        return {
+            "trader_id": trader_id,
+            "positions": holdings,
+            "realised_pnl": realised,
+            "unrealised_pnl": unrealised,
+            "total_pnl": realised + unrealised
+        }
@@ -0,0 +1,125 @@
+'''
+Reference order-book engine.
+
+ReferenceOrderBook is the executable specification of OrderBookEngine: plain dicts of
+price -> FIFO list, best prices found with max()/min() on every match, expiry by
+scanning every resting order. It is slow on purpose and obviously correct, so
+conformance.py can run any optimised engine against it and demand identical fills,
+events and book state.
+'''
+import time
+from orderbook import OrderBookEngine
+
+
+class ReferenceOrderBook(OrderBookEngine):
+    def __init__(self, symbol=None, clock=time.time):
+        self.symbol = symbol
+        self.clock = clock
+        self.bids = {} # price -> list of orders, oldest first
+        self.asks = {}
+        self.orders = {}
+        self.trades = []
+        self.ltp = None
+        self.listeners = []
+
+    def _book(self, side):
+        return self.bids if side == "BUY" else self.asks
+
+    def _remove(self, order):
+        book = self._book(order.side)
+        level = book[order.price]
+        level.remove(order)
+        if not level:
+            del book[order.price]
+        del self.orders[order.orderId]
+
+    def _match(self):
+        while self.bids and self.asks:
+            bid_price, ask_price = max(self.bids), min(self.asks)
+            if bid_price < ask_price:
+                break
+            bid, ask = self.bids[bid_price][0], self.asks[ask_price][0]
+            quantity = min(bid.quantity, ask.quantity)
+            # the trade prints at the ask's price whichever side was resting, as OrderBook does
+            self.ltp = ask.price
+            self.trades.append((bid.orderId, ask.orderId, ask.price, quantity))
+            self._emit_trade(bid, ask, ask.price, quantity)
+            bid.quantity -= quantity
+            ask.quantity -= quantity
+            for order in (ask, bid):
+                if order.quantity == 0:
+                    self._remove(order)
+                    self._emit_order_event("FILLED", order)
+
+    def add_limit_order(self, order):
+        if order.orderId not in self.orders:
+            self._book(order.side).setdefault(order.price, []).append(order)
+            self.orders[order.orderId] = order
+            self._emit_order_event("ACCEPTED", order)
+        self._match()
+        self._emit_book_update()
+
+    def cancel_order(self, orderId):
+        order = self.orders.get(orderId)
+        if order is None:
+            return False
+        self._remove(order)
+        self._emit_order_event("CANCELLED", order)
+        self._emit_book_update()
+        return True
+
+    def amend_order(self, orderId, quantity=None, price=None):
+        order = self.orders.get(orderId)
+        if order is None:
+            return False
+        quantity = order.quantity if quantity is None else quantity
+        price = order.price if price is None else price
+        if quantity <= 0:
+            return self.cancel_order(orderId)
+
+        if price == order.price and quantity <= order.quantity:
+            order.quantity = quantity
+        else:
+            self._remove(order)
+            order.price, order.quantity = price, quantity
+            self._book(order.side).setdefault(price, []).append(order)
+            self.orders[orderId] = order
+
+        self._emit_order_event("AMENDED", order)
+        self._match()
+        self._emit_book_update()
+        return True
+
+    def depth(self, levels=None):
+        def aggregate(book, prices):
+            return [(price, sum(order.quantity for order in book[price]), len(book[price]))
+                    for price in prices[:levels]]
+
+        return {
+            "bids": aggregate(self.bids, sorted(self.bids, reverse=True)),
+            "asks": aggregate(self.asks, sorted(self.asks))
+        }
+
+    def _flatten(self, book):
+        return [{"price": order.price, "quantity": order.quantity, "side": order.side}
+                for price in sorted(book) for order in book[price]]
+
+    def get_bids(self):
+        return self._flatten(self.bids)
+
+    def get_asks(self):
+        return self._flatten(self.asks)
+
+    def expire_orders(self, now=None):
+        now = self.clock() if now is None else now
+        expired = [order for order in self.orders.values()
+                   if order.expire_at is not None and order.expire_at <= now]
+        for order in expired:
+            self._remove(order)
+            self._emit_order_event("EXPIRED", order)
+        if expired:
+            self._emit_book_update()
+        return expired
+
+    def get_ltp(self):
+        return self.ltp
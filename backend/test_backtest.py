@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from backtest import Backtest, ColumnarSeries, SimClock, load_order_journal
+from orderbook import Order, MultiSecurityOrderBook
+from persistence import TradeStore
+
+
+class TestBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_memory_mapped_cache_matches_json(self):
+        """The mmap cache yields the same columns as parsing the JSON"""
+        parsed = ColumnarSeries.from_json()
+        cached = ColumnarSeries.load(cache_path=os.path.join(self.tmpdir.name, "history.columns"))
+        self.assertEqual(cached.symbols(), parsed.symbols())
+        for symbol in parsed.symbols():
+            self.assertEqual(list(cached[symbol][0]), list(parsed[symbol][0]))
+            self.assertEqual(list(cached[symbol][1]), list(parsed[symbol][1]))
+        cached.close()
+
+    def test_sim_clock_runs_sleeping_generators_in_time_order(self):
+        clock = SimClock(100)
+        seen = []
+
+        def sleeper(name, delay):
+            for _ in range(3):
+                seen.append((clock.time(), name))
+                yield delay
+
+        clock.spawn(sleeper("slow", 5))
+        clock.spawn(sleeper("fast", 2))
+        clock.run()
+        self.assertEqual(seen, [(100, "slow"), (100, "fast"), (102, "fast"), (104, "fast"),
+                                (105, "slow"), (110, "slow")])
+
+    def test_historical_run_tracks_the_series(self):
+        """Each session closes at the bar's value, with the bots trading in between"""
+        series = ColumnarSeries.from_json()
+        report = Backtest(series, days=3, session_seconds=300).run()
+        for ticker in report["tickers"]:
+            self.assertEqual(ticker["ltp"], series[ticker["symbol"]][1][2])
+        self.assertEqual(report["simulated_seconds"], 2 * 86400 + 300)
+        self.assertGreater(report["trades"], 0)
+        self.assertIn("AAPL", report["bots"])
+
+    def test_journal_replay_reproduces_recorded_trades(self):
+        """Orders recorded by TradeStore replay to the same fills"""
+        db_path = os.path.join(self.tmpdir.name, "journal.db")
+        store = TradeStore(db_path=db_path).start()
+        live = MultiSecurityOrderBook()
+        live.add_listener(store)
+        live.add_order("AAPL", Order("SELL", 101, 5, "LIMIT", "alice"))
+        live.add_order("AAPL", Order("SELL", 102, 5, "LIMIT", "alice"))
+        resting = Order("BUY", 99, 3, "LIMIT", "bob")
+        live.add_order("AAPL", resting)
+        live.get_order_book("AAPL").cancel_order(resting.orderId)
+        live.add_order("AAPL", Order("BUY", 102, 7, "LIMIT", "carol"))
+        store.close()
+
+        replay = Backtest(journal=load_order_journal(db_path))
+        report = replay.run()
+        original = live.get_order_book("AAPL")
+        replayed = replay.market.get_order_book("AAPL")
+        self.assertEqual(report["trades"], len(original.trades))
+        self.assertEqual([trade[2:] for trade in replayed.trades], [trade[2:] for trade in original.trades])
+        self.assertEqual(replayed.depth(), original.depth())
+
+    def test_journal_replay_expires_gtd_orders(self):
+        """A GTD order that lapsed live is gone before a later crossing order in the replay"""
+        db_path = os.path.join(self.tmpdir.name, "journal.db")
+        store = TradeStore(db_path=db_path).start()
+        now = [1000]
+        live = MultiSecurityOrderBook(clock=lambda: now[0])
+        live.add_listener(store)
+        live.add_order("AAPL", Order("SELL", 100, 5, "LIMIT", "alice", "GTD", expire_at=1005))
+        now[0] = 1010
+        live.expire_orders()
+        live.add_order("AAPL", Order("BUY", 100, 3, "LIMIT", "bob"))
+        store.close()
+
+        events = load_order_journal(db_path)
+        replay = Backtest(journal=events)
+        replay.run()
+        original = live.get_order_book("AAPL")
+        replayed = replay.market.get_order_book("AAPL")
+        self.assertEqual(original.trades, [])
+        self.assertEqual(replayed.trades, original.trades)
+        self.assertEqual(replayed.depth(), original.depth())
+
+
+if __name__ == "__main__":
+    unittest.main()
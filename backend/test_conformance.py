@@ -0,0 +1,48 @@
+import unittest
+from conformance import check_conformance, measure_throughput
+from orderbook import Order, OrderBook, MultiSecurityOrderBook
+from reference_engine import ReferenceOrderBook
+
+
+class TestEngineConformance(unittest.TestCase):
+
+    def test_orderbook_matches_reference(self):
+        """OrderBook produces the reference engine's fills, events and book state on random streams"""
+        for seed in range(5):
+            check_conformance(OrderBook, seed, count=1000)
+
+    def test_amend_priority(self):
+        """Shrinking keeps time priority, growing loses it"""
+        for engine_class in (OrderBook, ReferenceOrderBook):
+            order_book = engine_class("AAPL")
+            first = Order("SELL", 100, 5, "LIMIT", "alice")
+            second = Order("SELL", 100, 5, "LIMIT", "bob")
+            order_book.add_limit_order(first)
+            order_book.add_limit_order(second)
+
+            self.assertTrue(order_book.amend_order(first.orderId, quantity=3))
+            order_book.add_limit_order(Order("BUY", 100, 1, "LIMIT", "carol"))
+            self.assertEqual(order_book.trades[-1][1], first.orderId)
+
+            self.assertTrue(order_book.amend_order(first.orderId, quantity=10))
+            order_book.add_limit_order(Order("BUY", 100, 1, "LIMIT", "carol"))
+            self.assertEqual(order_book.trades[-1][1], second.orderId)
+
+            self.assertEqual(order_book.depth(), {"bids": [], "asks": [(100, 14, 2)]})
+            self.assertFalse(order_book.amend_order(12345, quantity=1))
+
+    def test_multi_security_order_book_accepts_any_engine(self):
+        multi_order_book = MultiSecurityOrderBook(engine=ReferenceOrderBook)
+        multi_order_book.add_order("TSLA", Order("SELL", 249, 2, "LIMIT"))
+        multi_order_book.add_order("TSLA", Order("BUY", 250, 1, "LIMIT"))
+        row = multi_order_book.top_of_book.read("TSLA")
+        self.assertEqual((row["ask"], row["ask_size"], row["ltp"]), (249, 1, 249))
+
+    def test_throughput_report(self):
+        report = measure_throughput([OrderBook], count=200)
+        self.assertEqual(set(report), {"ReferenceOrderBook", "OrderBook"})
+        self.assertEqual(report["ReferenceOrderBook"]["relative"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import random
+import threading
+import unittest
+from orderbook import Order, OrderBook, day_expiry
+from timerwheel import TimerWheel
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def test_fires_on_deadline_across_levels(self):
+        """Timers fire once their tick is reached, including ones cascaded from higher levels"""
+        wheel = TimerWheel(start=0, resolution=1.0, slots=8, levels=3)
+        wheel.schedule("soon", 3)
+        wheel.schedule("later", 20)  # level 1
+        wheel.schedule("much_later", 3000)  # beyond the top level, parked
+        wheel.schedule("cancelled", 5)
+        self.assertTrue(wheel.cancel("cancelled"))
+        self.assertFalse(wheel.cancel("cancelled"))
+
+        self.assertEqual(wheel.advance(2.5), [])
+        self.assertEqual(wheel.advance(3), ["soon"])
+        self.assertEqual(wheel.advance(19.9), [])
+        self.assertEqual(wheel.advance(20), ["later"])
+        self.assertEqual(wheel.advance(2999), [])
+        self.assertEqual(wheel.advance(5000), ["much_later"])
+        self.assertEqual(len(wheel), 0)
+
+    def test_single_level_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TimerWheel(levels=1)
+
+    def test_past_deadline_fires_on_next_tick(self):
+        wheel = TimerWheel(start=10, resolution=1.0)
+        wheel.schedule("late", 4)
+        self.assertEqual(wheel.advance(10.5), [])
+        self.assertEqual(wheel.advance(11), ["late"])
+
+
+class TestOrderExpiry(unittest.TestCase):
+
+    def test_expired_orders_and_levels_are_removed(self):
+        """GTD orders leave the book at their expiry, emptied levels go with them"""
+        now = [1000.0]
+        order_book = OrderBook("AAPL", clock=lambda: now[0])
+        order_book.add_limit_order(Order("BUY", 99, 5, "LIMIT", "alice", "GTD", 1010))
+        order_book.add_limit_order(Order("BUY", 99, 5, "LIMIT", "bob", "GTD", 1010))
+        order_book.add_limit_order(Order("BUY", 98, 5, "LIMIT", "carol"))
+        filled = Order("SELL", 101, 2, "LIMIT", "dave", "GTD", 1010)
+        order_book.add_limit_order(filled)
+        order_book.add_limit_order(Order("BUY", 101, 2, "LIMIT", "erin"))  # fills dave
+
+        self.assertEqual(order_book.expire_orders(), [])
+        now[0] = 1010.0
+        expired = order_book.expire_orders()
+        self.assertEqual(sorted(order.trader_id for order in expired), ["alice", "bob"])
+        self.assertEqual(order_book.get_best_bid(), 98)
+        self.assertEqual(len(order_book.orders), 1)
+        self.assertEqual(len(order_book.expiry_wheel), 0)
+
+    def test_expiry_concurrent_with_trading(self):
+        """Expiry running next to order threads leaves the book consistent"""
+        now = [1000.0]
+        order_book = OrderBook("AAPL", clock=lambda: now[0])
+
+        def trader(seed):
+            rng = random.Random(seed)
+            for _ in range(300):
+                order_book.add_limit_order(Order(rng.choice(["BUY", "SELL"]), rng.randint(95, 105),
+                                                 rng.randint(1, 5), "LIMIT", f"T{seed}", "GTD",
+                                                 now[0] + rng.randint(1, 5)))
+
+        def expirer():
+            for _ in range(300):
+                now[0] += 0.1
+                order_book.expire_orders()
+
+        threads = [threading.Thread(target=trader, args=(seed,)) for seed in range(3)]
+        threads.append(threading.Thread(target=expirer))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        resting = sum(count for _, _, count in order_book.depth()["bids"] + order_book.depth()["asks"])
+        self.assertEqual(resting, len(order_book.orders))
+        self.assertEqual(len(order_book.expiry_wheel), len(order_book.orders))
+
+    def test_time_in_force_validation(self):
+        order = Order("BUY", 100, 1, "LIMIT", time_in_force="DAY")
+        self.assertEqual(order.expire_at, day_expiry(order.timestamp))
+        self.assertGreater(order.expire_at, order.timestamp)
+        self.assertIsNone(Order("BUY", 100, 1, "LIMIT", expire_at=5).expire_at)
+        with self.assertRaises(ValueError):
+            Order("BUY", 100, 1, "LIMIT", time_in_force="GTD")
+        with self.assertRaises(ValueError):
+            Order("BUY", 100, 1, "LIMIT", time_in_force="IOC")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -52,19 +52,20 @@ class TestOrderBook(unittest.TestCase):
         self.print_order_books(order_book)
 
         # ✅ Verify Trades:
-        # - Orders @ 100: BUY (5 + 4) vs SELL (6) → Trades: 5 + 1
-        # - Orders @ 101: BUY (3) vs SELL (5) → Trade: 3
-        # - Orders @ 102: BUY (2) vs SELL (3) → Trade: 2
+        # add_limit_order matches continuously (OrderBookEngine semantics), so the SELL 6 @ 100
+        # already crosses the resting bids best price first, and every cross prints at the ask:
+        # - SELL 6 @ 100 vs BUY 2 @ 102, BUY 3 @ 101, BUY 5 @ 100 (oldest) → Trades: 2 + 3 + 1 @ 100
+        # - SELL 5 @ 101 and SELL 3 @ 102 rest, nothing bids that high any more
+        # - BUY 14 @ 102 (matchOrder) takes 5 @ 101 and 3 @ 102, the other 6 rest at 102
 
-        # ✅ Check Trades
-        self.assertEqual(len(order_book.trades), 4)  # 4 Trades in Total
-        self.assertEqual(order_book.trades[0][3], 5)  # First Trade: 5 @ 100
-        self.assertEqual(order_book.trades[1][3], 1)  # Second Trade: 1 @ 100
-        self.assertEqual(order_book.trades[2][3], 3)  # Third Trade: 3 @ 101
-        self.assertEqual(order_book.trades[3][3], 2)  # Fourth Trade: 2 @ 102
+        # ✅ Check Trades (bid id, ask id, price, quantity)
+        self.assertEqual([trade[2:] for trade in order_book.trades],
+                         [(100, 2), (100, 3), (100, 1), (101, 5), (102, 3)])
 
         # ✅ Check Remaining Orders
-        self.assertEqual(len(order_book.orders), 1)  # One SELL order at 102 remains with 1 share
+        # BUY 4 @ 100 (partially filled), BUY 4 @ 100 and the rest of the BUY 14: 6 @ 102
+        self.assertEqual(len(order_book.orders), 3)
+        self.assertEqual(order_book.depth(), {"bids": [(102, 6, 1), (100, 8, 2)], "asks": []})
 
 
 # ✅ Run the tests
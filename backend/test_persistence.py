@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from orderbook import Order, OrderBook
+from persistence import TradeStore
+
+
+class TestTradeStore(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def test_trades_and_order_events_are_persisted(self):
+        """Fills and lifecycle events reach the database through the background writer"""
+        store = TradeStore(db_path=self.db_path, flush_size=2, flush_interval=0.05).start()
+        order_book = OrderBook("AAPL")
+        order_book.add_listener(store)
+
+        order_book.add_limit_order(Order("SELL", 100, 5, "LIMIT", "alice"))
+        order_book.add_limit_order(Order("BUY", 100, 3, "LIMIT", "bob"))
+        store.flush()
+
+        trades = store.trades_for_trader("bob")
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(trades[0]["buy_trader_id"], "bob")
+        self.assertEqual(trades[0]["sell_trader_id"], "alice")
+        self.assertEqual(trades[0]["quantity"], 3)
+        self.assertEqual(store.trades_for_trader("alice", symbol="TSLA"), [])
+
+        store.close()
+        conn = sqlite3.connect(self.db_path)
+        events = conn.execute("SELECT trader_id, event FROM order_events ORDER BY id").fetchall()
+        conn.close()
+        self.assertEqual(events, [("alice", "ACCEPTED"), ("bob", "ACCEPTED"), ("bob", "FILLED")])
+
+    def test_full_queue_drops_rows_without_blocking(self):
+        """With block_on_full=False a full queue counts dropped rows instead of stalling the engine"""
+        store = TradeStore(db_path=self.db_path, max_queue=1, block_on_full=False)
+        order = Order("BUY", 100, 1, "LIMIT", "bob")
+        # writer not started, so nothing drains the queue
+        store.on_order_event("AAPL", "ACCEPTED", order, 0)
+        store.on_order_event("AAPL", "CANCELLED", order, 1)
+        self.assertEqual(store.dropped, 1)
+
+    def test_rows_after_close_are_dropped(self):
+        """A closed store still attached to a book drops rows instead of blocking the engine"""
+        store = TradeStore(db_path=self.db_path, max_queue=1).start()
+        order_book = OrderBook("AAPL")
+        order_book.add_listener(store)
+        store.close()
+
+        order_book.add_limit_order(Order("SELL", 100, 5, "LIMIT", "alice"))
+        order_book.add_limit_order(Order("BUY", 100, 3, "LIMIT", "bob"))
+        store.flush()
+        self.assertEqual(store.dropped, 4) # 2 accepted, 1 filled, 1 trade
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from orderbook import Order, MultiSecurityOrderBook
+from positions import Position, PositionKeeper
+
+
+class TestPositions(unittest.TestCase):
+
+    def test_average_cost_and_realised_pnl(self):
+        """Adding, reducing and flipping a position follows average-cost accounting"""
+        position = Position("AAPL")
+        position.apply_fill("BUY", 100, 10)
+        position.apply_fill("BUY", 110, 10)
+        self.assertEqual(position.quantity, 20)
+        self.assertEqual(position.avg_cost, 105)
+
+        position.apply_fill("SELL", 120, 5)  # realise 5 * (120 - 105)
+        self.assertEqual(position.quantity, 15)
+        self.assertEqual(position.realised_pnl, 75)
+
+        position.apply_fill("SELL", 100, 20)  # close 15 at -5 each, open 5 short at 100
+        self.assertEqual(position.quantity, -5)
+        self.assertEqual(position.realised_pnl, 0)
+        self.assertEqual(position.avg_cost, 100)
+        self.assertEqual(position.mark(90), 50)
+
+    def test_keeper_tracks_both_sides_of_each_fill(self):
+        """Every fill updates buyer and seller, and marks follow the LTP"""
+        multi_order_book = MultiSecurityOrderBook()
+        keeper = PositionKeeper(multi_order_book)
+        multi_order_book.add_listener(keeper)
+
+        multi_order_book.add_order("AAPL", Order("SELL", 100, 10, "LIMIT", "alice"))
+        multi_order_book.add_order("AAPL", Order("BUY", 100, 4, "LIMIT", "bob"))
+
+        portfolio = keeper.get_portfolio("bob")
+        self.assertEqual(portfolio["positions"][0]["quantity"], 4)
+        self.assertEqual(keeper.get_position("alice", "AAPL").quantity, -4)
+
+        multi_order_book.add_order("AAPL", Order("BUY", 100, 1, "LIMIT", "carol"))
+        multi_order_book.add_order("AAPL", Order("SELL", 90, 2, "LIMIT", "dave"))
+        multi_order_book.add_order("AAPL", Order("BUY", 90, 2, "LIMIT", "erin"))  # LTP now 90
+
+        portfolio = keeper.get_portfolio("bob")
+        self.assertEqual(portfolio["unrealised_pnl"], -40)
+        self.assertEqual(portfolio["total_pnl"], -40)
+        self.assertEqual(keeper.get_portfolio("nobody")["positions"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import unittest
+import uuid
+from orderbook import Order, MultiSecurityOrderBook, TopOfBookTable
+
+
+class TestTopOfBookTable(unittest.TestCase):
+
+    def test_rows_follow_the_top_of_book(self):
+        """Best bid/ask, sizes, LTP and volume are kept per symbol with a moving sequence number"""
+        multi_order_book = MultiSecurityOrderBook()
+        multi_order_book.add_order("AAPL", Order("BUY", 99, 4, "LIMIT"))
+        multi_order_book.add_order("AAPL", Order("BUY", 99, 1, "LIMIT"))
+        multi_order_book.add_order("AAPL", Order("SELL", 101, 3, "LIMIT"))
+
+        row = multi_order_book.top_of_book.read("AAPL")
+        self.assertEqual((row["bid"], row["bid_size"], row["ask"], row["ask_size"]), (99, 5, 101, 3))
+        self.assertIsNone(row["ltp"])
+
+        multi_order_book.add_order("AAPL", Order("BUY", 101, 2, "LIMIT"))
+        row = multi_order_book.top_of_book.read("AAPL")
+        self.assertEqual((row["ask_size"], row["ltp"], row["volume"]), (1, 101, 2))
+
+        seq = row["seq"]
+        multi_order_book.add_order("AAPL", Order("BUY", 90, 1, "LIMIT"))  # below the top
+        self.assertEqual(multi_order_book.top_of_book.read("AAPL")["seq"], seq)
+
+        tickers = {row["symbol"]: row for row in multi_order_book.get_tickers()}
+        self.assertEqual(set(tickers), {"AAPL", "TSLA", "MSFT"})
+        self.assertIsNone(tickers["TSLA"]["bid"])
+
+    def test_shared_memory_export(self):
+        """Another process can attach to the exported table by name"""
+        name = f"asx_tickers_{uuid.uuid4().hex[:8]}"
+        multi_order_book = MultiSecurityOrderBook(shm_name=name)
+        try:
+            multi_order_book.add_order("MSFT", Order("SELL", 388, 7, "LIMIT"))
+            reader = TopOfBookTable.attach(name)
+            self.assertEqual(reader.symbols, ["AAPL", "TSLA", "MSFT"])
+            row = reader.read("MSFT")
+            self.assertEqual((row["ask"], row["ask_size"]), (388, 7))
+            reader.close()
+        finally:
+            multi_order_book.top_of_book.close()
+
+        # closing the owner unlinks the segment, and later book updates are ignored
+        with self.assertRaises(FileNotFoundError):
+            TopOfBookTable.attach(name)
+        multi_order_book.add_order("MSFT", Order("SELL", 387, 1, "LIMIT"))
+
+    def test_reader_process_exit_keeps_the_segment(self):
+        """A reader in another process can attach, read and exit without unlinking the owner's segment"""
+        name = f"asx_tickers_{uuid.uuid4().hex[:8]}"
+        multi_order_book = MultiSecurityOrderBook(shm_name=name)
+        try:
+            multi_order_book.add_order("MSFT", Order("SELL", 388, 7, "LIMIT"))
+            reader = ("from orderbook import TopOfBookTable\n"
+                      f"table = TopOfBookTable.attach({name!r})\n"
+                      "print(table.read('MSFT')['ask'])\n"
+                      "table.close()\n")
+            result = subprocess.run([sys.executable, "-c", reader], capture_output=True, text=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__)), timeout=30)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout.strip(), "388.0")
+
+            table = TopOfBookTable.attach(name)
+            self.assertEqual(table.read("MSFT")["ask_size"], 7)
+            table.close()
+        finally:
+            multi_order_book.top_of_book.close()
+
+    def test_close_tolerates_a_removed_segment(self):
+        """The owner's close() succeeds even if the segment was unlinked behind its back"""
+        name = f"asx_tickers_{uuid.uuid4().hex[:8]}"
+        table = TopOfBookTable(["AAPL"], shm_name=name)
+        table.shm.unlink()
+        table.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
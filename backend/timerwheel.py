@@ -0,0 +1,112 @@
+'''
+Hierarchical timer wheel (Varghese & Lauck) used to expire DAY/GTD orders.
+
+Time is cut into ticks of `resolution` seconds. Level 0 has one slot per tick for
+the next `slots` ticks, level 1 one slot per `slots` ticks, and so on, so 4 levels
+of 64 slots at 1s cover ~194 days. Each slot is a dict keyed by timer key:
+- schedule: compute the level/slot from the deadline and insert, O(1)
+- cancel: look up the key's slot and delete it, O(1)
+- advance: walk the ticks up to `now`, cascading a higher level's slot down into
+  the lower levels whenever the lower wheel wraps, and fire the level 0 slot.
+  Stretches with nothing due are skipped a whole lower-level span at a time.
+
+Deadlines are rounded up to the next tick, so a timer never fires early and at
+most one tick late. Deadlines past the top level are parked in its furthest slot
+and re-placed when that slot cascades.
+'''
+import math
+
+
+class TimerWheel:
+    def __init__(self, start=0.0, resolution=1.0, slots=64, levels=4):
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        if levels < 2:
+            # parked far deadlines are only re-placed when a higher level cascades
+            raise ValueError("a timer wheel needs at least 2 levels")
+        self.resolution = resolution
+        self.bits = slots.bit_length() - 1
+        self.mask = slots - 1
+        self.levels = levels
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)] # slot: key -> deadline tick
+        self.counts = [0] * levels # timers per level, to skip idle stretches
+        self.timers = {} # key -> (level, slot)
+        self.current = math.floor(start / resolution) # last tick processed
+
+    def __len__(self):
+        return len(self.timers)
+
+    def __contains__(self, key):
+        return key in self.timers
+
+    def schedule(self, key, when):
+        """Fire `key` once the wheel is advanced to `when` (seconds); reschedules if present."""
+        if key in self.timers:
+            self.cancel(key)
+        # the current tick has already fired, so anything due now goes on the next one
+        self._insert(key, max(math.ceil(when / self.resolution), self.current + 1))
+
+    def cancel(self, key):
+        """Remove a pending timer; returns False if it was not scheduled."""
+        location = self.timers.pop(key, None)
+        if location is None:
+            return False
+        level, slot = location
+        del self.wheels[level][slot][key]
+        self.counts[level] -= 1
+        return True
+
+    def _insert(self, key, deadline):
+        delta = deadline - self.current
+        level = 0
+        while level < self.levels - 1 and delta >> (self.bits * (level + 1)):
+            level += 1
+        # beyond the top level's range: park in its furthest slot, re-placed on cascade
+        slot_tick = min(deadline, self.current + (1 << (self.bits * self.levels)) - 1)
+        slot = (slot_tick >> (self.bits * level)) & self.mask
+        self.wheels[level][slot][key] = deadline
+        self.counts[level] += 1
+        self.timers[key] = (level, slot)
+
+    def _cascade(self, level, slot):
+        entries = self.wheels[level][slot]
+        if entries:
+            self.wheels[level][slot] = {}
+            self.counts[level] -= len(entries)
+            for key, deadline in entries.items():
+                # due this very tick lands in the level 0 slot that fires next
+                self._insert(key, max(deadline, self.current))
+
+    def advance(self, now):
+        """Move the wheel to `now` (seconds) and return the keys of every timer that fired."""
+        target = math.floor(now / self.resolution)
+        fired = []
+        while self.current < target:
+            if not self.timers:
+                self.current = target
+                break
+
+            lowest = next(level for level in range(self.levels) if self.counts[level])
+            if lowest > 0:
+                # nothing at the lower levels: jump to the next tick where `lowest` cascades
+                span = 1 << (self.bits * lowest)
+                boundary = (self.current // span + 1) * span
+                if boundary > target:
+                    self.current = target
+                    break
+                self.current = boundary - 1
+
+            tick = self.current = self.current + 1
+            for level in range(self.levels - 1, 0, -1):
+                if tick & ((1 << (self.bits * level)) - 1) == 0:
+                    self._cascade(level, (tick >> (self.bits * level)) & self.mask)
+
+            slot = tick & self.mask
+            due = self.wheels[0][slot]
+            if due:
+                self.wheels[0][slot] = {}
+                self.counts[0] -= len(due)
+                for key in due:
+                    del self.timers[key]
+                fired.extend(due)
+        return fired